@@ -1,3 +1,4 @@
+import os
 import shap
 import warnings
 import numpy as np
@@ -5,11 +6,16 @@ import pandas as pd
 import seaborn as sns
 from typing import Any
 import matplotlib.pyplot as plt
+from scipy.stats import norm
+import xgboost
 from xgboost import XGBClassifier
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import StratifiedKFold
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, roc_curve, classification_report, ConfusionMatrixDisplay
+from profiling import profiled, enable_profiling, profile_summary, write_chrome_trace
+from monitoring import build_reference, save_reference, DriftMonitor, drift_summary
 
 np.random.seed(42)
 warnings.filterwarnings('ignore')
@@ -26,10 +32,81 @@ def _col(df: pd.DataFrame, col: str) -> pd.Series:
     return df[col]
 
 
+# ══════════════════════════════════════════════════════════════════
+# PLOT OUTPUT MODE
+# 'show' : plt.show() inline (interactive default)
+# 'save' : render PNGs to output_dir on a background thread pool
+# 'off'  : skip figures entirely; plotting functions only compute
+#          and print their metrics
+# ══════════════════════════════════════════════════════════════════
+
+_PLOTS = {'mode': 'show', 'dir': 'figures', 'workers': 2, 'pool': None, 'futures': [], 'count': 0}
+
+
+def set_plot_mode(mode: str, output_dir: str = 'figures', workers: int = 2) -> None:
+    """
+    Select how the plotting functions emit figures.
+
+    'save' and 'off' switch matplotlib to the non-interactive Agg
+    backend so nothing blocks on a display.
+
+    Args:
+        mode       (str): 'show', 'save' or 'off'.
+        output_dir (str): Directory for PNG files in 'save' mode.
+        workers    (int): Background threads rendering figures in 'save' mode.
+    """
+    if mode not in ('show', 'save', 'off'):
+        raise ValueError(f"Unknown plot mode: {mode}")
+
+    wait_for_plots()
+    _PLOTS.update(mode=mode, dir=output_dir, workers=workers)
+    if mode != 'show':
+        plt.switch_backend('Agg')
+    if mode == 'save':
+        os.makedirs(output_dir, exist_ok=True)
+
+
+def _plots_enabled() -> bool:
+    """False in 'off' mode, so callers can skip building figures at all."""
+    return _PLOTS['mode'] != 'off'
+
+
+def _finish_figure(fig: plt.Figure, name: str) -> None:
+    """
+    Show the figure, or hand it to the render pool in 'save' mode.
+
+    The figure is detached from pyplot on the calling thread; only
+    savefig() (the rasterisation) runs in the background. The pool is
+    started on first use, so figures can still be queued after a
+    wait_for_plots().
+    """
+    if _PLOTS['mode'] == 'show':
+        plt.show()
+        return
+
+    _PLOTS['count'] += 1
+    path = os.path.join(_PLOTS['dir'], f"{_PLOTS['count']:02d}_{name}.png")
+    plt.close(fig)
+    if _PLOTS['pool'] is None:
+        _PLOTS['pool'] = ThreadPoolExecutor(max_workers=_PLOTS['workers'])
+    _PLOTS['futures'].append(_PLOTS['pool'].submit(fig.savefig, path, dpi=110))
+
+
+def wait_for_plots() -> None:
+    """Block until all figures queued in 'save' mode are written."""
+    for future in _PLOTS['futures']:
+        future.result()
+    _PLOTS['futures'].clear()
+    if _PLOTS['pool'] is not None:
+        _PLOTS['pool'].shutdown()
+        _PLOTS['pool'] = None
+
+
 # ══════════════════════════════════════════════════════════════════
 # LAYER 1 — DATA INGESTION
 # ══════════════════════════════════════════════════════════════════
 
+@profiled('LAYER 1')
 def load_data(filename: str) -> pd.DataFrame:
     """
     Load a dataset from a CSV file into a DataFrame.
@@ -113,26 +190,34 @@ def expected_loss(data_test: pd.DataFrame) -> float:
     return _col(data_test, 'EL_amount').sum()
 
 
-def actual_loss(data_test: pd.DataFrame) -> float:
+def actual_loss(
+    data_test: pd.DataFrame,
+    annual_rate: float,
+    months: int,
+    payments_made: int = 60
+) -> float:
     """
     Loss from missed defaults: approved loans that actually defaulted.
-    Model predicted 0 (approve) but true label is 1 (default).
+    Model predicted 0 (approve) but true label is 1 (default); each is
+    lost at its outstanding balance after payments_made payments
+    (before the loss rate applied in metrics_from_totals()).
     """
-    return data_test.loc[
-        (data_test['model_prediction'] == 0) & (data_test['BAD'] == 1),
-        'outstanding_balance'
-    ].sum()
+    missed = (data_test['model_prediction'] == 0) & (data_test['BAD'] == 1)
+    return outstanding_balance(
+        principal=data_test.loc[missed, 'LOAN'], annual_rate=annual_rate,
+        months=months, payments_made=payments_made
+    ).sum()
 
 
-def opportunity_cost(data_test: pd.DataFrame) -> float:
+def opportunity_cost(data_test: pd.DataFrame, annual_rate: float, months: int) -> float:
     """
     Foregone income from incorrectly rejected good clients.
-    Model predicted 1 (reject) but true label is 0 (no default).
+    Model predicted 1 (reject) but true label is 0 (no default); the
+    cost is the interest the amortized loan would have generated.
     """
-    return data_test.loc[
-        (data_test['model_prediction'] == 1) & (data_test['BAD'] == 0),
-        'interest_generated'
-    ].sum()
+    rejected_good = (data_test['model_prediction'] == 1) & (data_test['BAD'] == 0)
+    loan = data_test.loc[rejected_good, 'LOAN']
+    return (amortization(principal=loan, annual_rate=annual_rate, months=months) - loan).sum()
 
 
 def mean_pd(data_test: pd.DataFrame) -> float:
@@ -154,6 +239,7 @@ def weighted_pd(data_test: pd.DataFrame) -> float:
 # Composes all feature functions above into a single transformation.
 # ══════════════════════════════════════════════════════════════════
 
+@profiled('LAYER 3')
 def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
     """
     Derive mortgage-specific risk features from raw columns.
@@ -186,6 +272,7 @@ def feature_engineering(df: pd.DataFrame) -> pd.DataFrame:
 # LAYER 4 — MODEL INPUTS
 # ══════════════════════════════════════════════════════════════════
 
+@profiled('LAYER 4')
 def prepare_model_inputs(
     df: pd.DataFrame,
     target: str,
@@ -217,6 +304,7 @@ def prepare_model_inputs(
 # LAYER 5 — MODEL TRAINING & EVALUATION
 # ══════════════════════════════════════════════════════════════════
 
+@profiled('LAYER 5')
 def train_logistic_regression(X_train: pd.DataFrame, y_train: pd.Series) -> LogisticRegression:
     """
     Train a logistic regression model as a baseline.
@@ -233,15 +321,40 @@ def train_logistic_regression(X_train: pd.DataFrame, y_train: pd.Series) -> Logi
     return model
 
 
+# Default XGBoost hyperparameters. tuning.py writes a best-config artifact
+# whose params override these through train_xgboost(params=...).
+XGB_PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'auc',
+    'n_estimators': 1000,
+    'max_depth': 8,
+    'learning_rate': 0.01,
+    'min_child_weight': 3,
+    'subsample': 0.7,
+    'colsample_bytree': 0.7,
+    'tree_method': 'hist',
+}
+
+
+@profiled('LAYER 5')
 def train_xgboost(
     X_train: pd.DataFrame,
     y_train: pd.Series,
     X_val: pd.DataFrame,
     y_val: pd.Series,
-    random_state: int
+    random_state: int,
+    early_stopping_rounds: int | None = 50,
+    eval_train: bool = False,
+    params: dict | None = None,
+    sample_weight: np.ndarray | None = None,
+    sample_weight_val: np.ndarray | None = None
 ) -> XGBClassifier:
     """
-    Train an XGBoost classifier.
+    Train an XGBoost classifier with early stopping on the validation set.
+
+    Boosting stops once validation AUC has not improved for
+    early_stopping_rounds rounds. The fitted model keeps best_iteration,
+    and predict()/predict_proba() only use the trees up to it.
 
     Args:
         X_train (pd.DataFrame): Training features.
@@ -249,31 +362,195 @@ def train_xgboost(
         X_val (pd.DataFrame): Validation features.
         y_val (pd.Series): Validation labels.
         random_state (int, optional): Random state for reproducibility.
+        early_stopping_rounds (int | None): Rounds without validation AUC
+            improvement before stopping. None fits all n_estimators.
+        eval_train (bool): Also evaluate AUC on the training set every round.
+            Off by default since the output is discarded (verbose=0).
+        params (dict | None): Overrides for XGB_PARAMS, e.g. the output of
+            tuning.load_best_params().
+        sample_weight (np.ndarray | None): Per-row training weights, e.g.
+            bootstrap_weights() counts.
+        sample_weight_val (np.ndarray | None): Per-row validation weights.
 
     Returns:
         XGBClassifier: Fitted XGBoost classifier.
     """
-    model = XGBClassifier(
-        objective='binary:logistic',
-        eval_metric='auc',
-        n_estimators=1000,
-        max_depth=8,
-        learning_rate=0.01,
-        min_child_weight=3,
-        subsample=0.7,
-        colsample_bytree=0.7,
-        tree_method='hist',
-        random_state=random_state,
-        n_jobs=-1,
-    )
+    model = XGBClassifier(**{
+        **XGB_PARAMS,
+        'early_stopping_rounds': early_stopping_rounds,
+        'random_state': random_state,
+        'n_jobs': -1,
+        **(params or {}),
+    })
+
+    # Early stopping monitors the last entry of eval_set (validation)
+    eval_set = [(X_val, y_val)]
+    eval_weights = [sample_weight_val]
+    if eval_train:
+        eval_set.insert(0, (X_train, y_train))
+        eval_weights.insert(0, sample_weight)
+
+    weighted = sample_weight is not None or sample_weight_val is not None
     model.fit(
         X_train, y_train,
-        eval_set=[(X_train, y_train), (X_val, y_val)],
+        sample_weight=sample_weight,
+        eval_set=eval_set,
+        sample_weight_eval_set=eval_weights if weighted else None,
         verbose=0
     )
     return model
 
 
+def native_params(params: dict | None, random_state: int) -> tuple[dict, int]:
+    """
+    XGB_PARAMS plus overrides in xgboost.train() form.
+
+    Args:
+        params       (dict | None): Overrides, as passed to train_xgboost().
+        random_state (int)        : Random state for reproducibility.
+
+    Returns:
+        tuple: (booster parameters, number of boosting rounds).
+    """
+    native = {**XGB_PARAMS, 'seed': random_state, **(params or {})}
+    native.pop('random_state', None)
+    if 'n_jobs' in native:
+        native['nthread'] = native.pop('n_jobs')
+    return native, native.pop('n_estimators')
+
+
+class QuantizedTrainingSet:
+    """
+    Training rows converted and quantile-sketched once, viewed per fold.
+
+    The full set is held as one float32 matrix plus a QuantileDMatrix
+    whose cut points are computed once. Fold matrices are row subsets
+    built with ref= to those cuts, so no fold re-runs the sketch or
+    converts from pandas. Fits on all rows can pass `full` directly,
+    as refresh.refresh_xgboost() does; k_fold_cross_validation() only
+    uses the fold views.
+
+    Args:
+        X_train       (pd.DataFrame)     : Training features.
+        y_train       (pd.Series)        : Training labels.
+        sample_weight (np.ndarray | None): Per-row weights, e.g. bootstrap_weights().
+        max_bin       (int)              : Histogram bins per feature.
+    """
+
+    def __init__(
+        self,
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        sample_weight: np.ndarray | None = None,
+        max_bin: int = 256
+    ):
+        self.columns = list(X_train.columns)
+        self.X = np.ascontiguousarray(X_train.to_numpy(dtype=np.float32))
+        self.y = np.asarray(y_train)
+        self.weight = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float32)
+        self.max_bin = max_bin
+        self.full = xgboost.QuantileDMatrix(self.X, self.y, weight=self.weight,
+                                            feature_names=self.columns, max_bin=max_bin)
+
+    def view(
+        self,
+        idx: np.ndarray,
+        ref: xgboost.QuantileDMatrix | None = None
+    ) -> xgboost.QuantileDMatrix:
+        """
+        Rows idx, binned on the full set's cut points.
+
+        Args:
+            idx (np.ndarray)             : Row positions.
+            ref (QuantileDMatrix | None) : Training view this matrix will be
+                                           evaluated against (xgboost.train()
+                                           requires eval sets to reference
+                                           their training matrix). Its cuts
+                                           are the full set's.
+
+        Returns:
+            xgboost.QuantileDMatrix: Fold matrix.
+        """
+        return xgboost.QuantileDMatrix(
+            self.X[idx], self.y[idx],
+            weight=None if self.weight is None else self.weight[idx],
+            feature_names=self.columns, max_bin=self.max_bin,
+            ref=self.full if ref is None else ref
+        )
+
+
+@profiled('LAYER 5')
+def train_xgboost_dmatrix(
+    dtrain: xgboost.DMatrix,
+    dval: xgboost.DMatrix,
+    random_state: int,
+    early_stopping_rounds: int | None = 50,
+    params: dict | None = None,
+    base_model: XGBClassifier | None = None
+) -> XGBClassifier:
+    """
+    train_xgboost() on prepared DMatrix objects.
+
+    Same hyperparameters and early stopping on validation AUC. The
+    booster is returned as an XGBClassifier, so best_iteration(),
+    predict_proba() and the scoring module work unchanged.
+
+    With base_model, boosting continues from its trees up to
+    best_iteration() and n_estimators counts the added rounds.
+
+    Args:
+        dtrain                (xgboost.DMatrix): Training matrix (e.g. QuantizedTrainingSet.view()).
+        dval                  (xgboost.DMatrix): Validation matrix.
+        random_state          (int)            : Random state for reproducibility.
+        early_stopping_rounds (int | None)     : Rounds without improvement before stopping.
+        params                (dict | None)    : Overrides for XGB_PARAMS.
+        base_model            (XGBClassifier | None): Model to continue boosting from.
+
+    Returns:
+        XGBClassifier: Fitted XGBoost classifier.
+    """
+    native, rounds = native_params(params, random_state)
+    base = None if base_model is None else base_model.get_booster()[:best_iteration(base_model)]
+    booster = xgboost.train(
+        native, dtrain, num_boost_round=rounds,
+        evals=[(dval, 'validation')],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+        xgb_model=base
+    )
+    model = XGBClassifier()
+    model.load_model(booster.save_raw('json'))
+    return model
+
+
+def best_iteration(model: XGBClassifier) -> int:
+    """
+    Number of boosting rounds actually used for prediction.
+
+    Args:
+        model (XGBClassifier): Fitted XGBoost classifier.
+
+    Returns:
+        int: best_iteration + 1 when early stopping triggered,
+             otherwise the total number of fitted trees.
+    """
+    try:
+        return model.best_iteration + 1
+    except AttributeError:
+        return model.get_booster().num_boosted_rounds()
+
+
+def _bootstrap_indices(n: int, n_samples: int | None, random_state: int) -> np.ndarray:
+    """Row positions drawn with replacement (defaults to 2x original size)."""
+    rng = np.random.default_rng(random_state)
+
+    if n_samples is None:
+        n_samples = n * 2   # default: double your data
+
+    return rng.integers(0, n, size=n_samples)   # sample WITH replacement
+
+
+@profiled('LAYER 5')
 def bootstrap_training_data(
     X_train: pd.DataFrame,
     y_train: pd.Series,
@@ -283,6 +560,9 @@ def bootstrap_training_data(
     """
     Generate a larger training set via bootstrap resampling.
 
+    Materializes the resampled rows. See bootstrap_weights() for the
+    equivalent weighted form without duplicated rows.
+
     Args:
         X_train      : Original training features.
         y_train      : Original training labels.
@@ -292,36 +572,67 @@ def bootstrap_training_data(
     Returns:
         tuple: (X_boot, y_boot) — bootstrapped features and labels.
     """
-    rng = np.random.default_rng(random_state)
-    n = len(X_train)
-
-    if n_samples is None:
-        n_samples = n * 2   # default: double your data
-
-    idx = rng.integers(0, n, size=n_samples)   # sample WITH replacement
+    idx = _bootstrap_indices(len(X_train), n_samples, random_state)
     X_boot = X_train.iloc[idx].reset_index(drop=True)
     y_boot = y_train.iloc[idx].reset_index(drop=True)
 
     return X_boot, y_boot
 
 
-def model_predictions(model: Any, X_test: pd.DataFrame) -> np.ndarray:
+@profiled('LAYER 5')
+def bootstrap_weights(
+    X_train: pd.DataFrame,
+    n_samples: int = None,
+    random_state: int = 10
+) -> np.ndarray:
     """
-    Get predicted probabilities of default from the model.
+    Bootstrap resampling expressed as integer sample weights.
+
+    Draws the same indices as bootstrap_training_data() and counts how
+    often each original row was picked. Training XGBoost on X_train with
+    these weights has the same effect as training on the materialized
+    bootstrap, without duplicating any rows.
 
     Args:
-        model  (LogisticRegression): Fitted logistic regression model.
-        X_test (pd.DataFrame)      : Test features.
+        X_train      : Original training features.
+        n_samples    : How many rows to sample. Defaults to 2x original size.
+        random_state : Reproducibility seed.
 
     Returns:
-        np.ndarray: Predicted probabilities of default for the test set.
+        np.ndarray: Draw count per row of X_train (0 = not drawn).
     """
-    return model.predict(X_test), model.predict_proba(X_test)[:, 1]
+    n = len(X_train)
+    idx = _bootstrap_indices(n, n_samples, random_state)
+    return np.bincount(idx, minlength=n)
 
 
-def curva_roc(probabilidades: np.ndarray, y_test: np.ndarray) -> float:
+@profiled('LAYER 5')
+def model_predictions(
+    model: Any,
+    X_test: pd.DataFrame,
+    threshold: float = 0.5
+) -> tuple[np.ndarray, np.ndarray]:
     """
-    Plot the ROC curve and return the optimal classification threshold.
+    Get predicted labels and probabilities of default from the model.
+
+    The model is evaluated once; labels are derived from the
+    probabilities instead of a second predict() pass.
+
+    Args:
+        model     (Any)         : Fitted classifier with predict_proba().
+        X_test    (pd.DataFrame): Test features.
+        threshold (float)       : Cutoff for the binary labels.
+
+    Returns:
+        tuple: (labels, probabilities of default) for the test set.
+    """
+    proba = model.predict_proba(X_test)[:, 1]
+    return (proba >= threshold).astype(int), proba
+
+
+def optimal_threshold(probabilidades: np.ndarray, y_test: np.ndarray) -> dict:
+    """
+    ROC curve, AUC and the optimal classification threshold.
 
     The optimal threshold minimises the Euclidean distance to the
     perfect-classifier point (FPR=0, TPR=1) on the ROC curve.
@@ -331,16 +642,45 @@ def curva_roc(probabilidades: np.ndarray, y_test: np.ndarray) -> float:
         y_test         (np.ndarray): True binary labels.
 
     Returns:
-        float: Optimal threshold value.
+        dict: best_thr, best_fpr, best_tpr, auc, and the fpr/tpr arrays.
     """
     fpr, tpr, thresholds = roc_curve(y_score=probabilidades, y_true=y_test)
 
     distances = np.sqrt(fpr**2 + (1 - tpr)**2)
     best_idx = np.argmin(distances)
-    best_thr = thresholds[best_idx]
-    best_fpr = fpr[best_idx]
-    best_tpr = tpr[best_idx]
-    auc_score = roc_auc_score(y_test, probabilidades)
+    return {
+        'best_thr': thresholds[best_idx],
+        'best_fpr': fpr[best_idx],
+        'best_tpr': tpr[best_idx],
+        'auc'     : roc_auc_score(y_test, probabilidades),
+        'fpr'     : fpr,
+        'tpr'     : tpr,
+    }
+
+
+@profiled('LAYER 5')
+def curva_roc(probabilidades: np.ndarray, y_test: np.ndarray) -> float:
+    """
+    Plot the ROC curve and return the optimal classification threshold.
+
+    Composes optimal_threshold(). In 'off' plot mode nothing is drawn.
+
+    Args:
+        probabilidades (np.ndarray): Predicted probabilities of default.
+        y_test         (np.ndarray): True binary labels.
+
+    Returns:
+        float: Optimal threshold value.
+    """
+    roc = optimal_threshold(probabilidades, y_test)
+    fpr, tpr = roc['fpr'], roc['tpr']
+    best_thr = roc['best_thr']
+    best_fpr = roc['best_fpr']
+    best_tpr = roc['best_tpr']
+    auc_score = roc['auc']
+
+    if not _plots_enabled():
+        return best_thr
 
     fig, ax = plt.subplots(figsize=(9, 5))
     ax.fill_between(fpr, tpr, alpha=0.08, color='#2E86AB')
@@ -362,16 +702,46 @@ def curva_roc(probabilidades: np.ndarray, y_test: np.ndarray) -> float:
                  fontsize=13, fontweight='bold', pad=12)
     ax.legend(fontsize=10, framealpha=0.9, loc='lower right')
     plt.tight_layout()
-    plt.show()
+    _finish_figure(fig, 'roc_curve')
 
     return best_thr
 
 
-def k_fold_cross_validation(
+def cv_folds(
     X_train: pd.DataFrame,
     y_train: pd.Series,
     n_splits: int,
     random_state: int
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Positional (train_idx, val_idx) pairs for stratified K-Fold.
+
+    Shared by k_fold_cross_validation() and the tuning search so both
+    evaluate exactly the same folds for a given seed.
+
+    Args:
+        X_train      : Full training features.
+        y_train      : Full training labels.
+        n_splits     : Number of folds.
+        random_state : Reproducibility seed.
+
+    Returns:
+        list: One (train_idx, val_idx) tuple per fold.
+    """
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True,
+                          random_state=random_state)
+    return list(skf.split(X_train, y_train))
+
+
+@profiled('LAYER 5')
+def k_fold_cross_validation(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    n_splits: int,
+    random_state: int,
+    params: dict | None = None,
+    sample_weight: np.ndarray | None = None,
+    dataset: QuantizedTrainingSet | None = None
 ) -> dict:
     """
     Stratified K-Fold cross validation for the XGBoost PD model.
@@ -382,40 +752,55 @@ def k_fold_cross_validation(
     Each fold trains on (k-1) folds and validates on the remaining one.
     Final metrics are averaged across all folds.
 
+    The training set is quantized once (QuantizedTrainingSet); every
+    fold reuses its cut points through row views.
+
     Args:
         X_train      : Full training features (pre-split from test set).
         y_train      : Full training labels.
         n_splits     : Number of folds (default 5).
         random_state : Reproducibility seed.
+        params       : Optional XGBoost overrides passed to train_xgboost_dmatrix().
+        sample_weight: Optional per-row weights (bootstrap_weights()). Fold
+                       models and AUCs are weighted accordingly.
+        dataset      : Prebuilt QuantizedTrainingSet of (X_train, y_train,
+                       sample_weight), e.g. shared with other CV or tuning
+                       runs. Built here when None.
 
     Returns:
         dict: {
             'fold_aucs'  : list of AUC per fold,
             'mean_auc'   : mean AUC across folds,
             'std_auc'    : standard deviation of AUC across folds,
-            'fold_probas': list of (y_val_true, y_val_proba) per fold
+            'fold_probas': list of (y_val_true, y_val_proba, w_val) per fold
+                           (w_val is None without sample_weight),
+            'fold_models': fitted model per fold
         }
     """
-    skf = StratifiedKFold(n_splits=n_splits, shuffle=True,
-                          random_state=random_state)
     fold_aucs = []
     fold_probas = []
+    fold_models = []
 
-    for fold, (train_idx, val_idx) in enumerate(skf.split(X_train, y_train), start=1):
-        X_fold_train = X_train.iloc[train_idx]
-        y_fold_train = y_train.iloc[train_idx]
-        X_fold_val = X_train.iloc[val_idx]
-        y_fold_val = y_train.iloc[val_idx]
+    if dataset is None:
+        dataset = QuantizedTrainingSet(X_train, y_train, sample_weight)
 
-        model = train_xgboost(X_fold_train, y_fold_train,
-                              X_fold_val, y_fold_val, random_state=random_state)
+    folds = cv_folds(X_train, y_train, n_splits, random_state)
+    for fold, (train_idx, val_idx) in enumerate(folds, start=1):
+        dtrain = dataset.view(train_idx)
+        dval = dataset.view(val_idx, ref=dtrain)
+        model = train_xgboost_dmatrix(dtrain, dval, random_state=random_state, params=params)
 
-        _, y_val_proba = model_predictions(model, X_fold_val)
-        auc = roc_auc_score(y_fold_val, y_val_proba)
+        y_fold_val = y_train.iloc[val_idx]
+        w_fold_val = None if sample_weight is None else sample_weight[val_idx]
+        y_val_proba = model.get_booster().predict(
+            dval, iteration_range=(0, best_iteration(model)))
+        auc = roc_auc_score(y_fold_val, y_val_proba, sample_weight=w_fold_val)
         fold_aucs.append(auc)
-        fold_probas.append((y_fold_val, y_val_proba))
+        fold_probas.append((y_fold_val, y_val_proba, w_fold_val))
+        fold_models.append(model)
 
-        print(f"  Fold {fold}/{n_splits} — AUC: {auc:.4f}")
+        print(f"  Fold {fold}/{n_splits} — AUC: {auc:.4f}"
+              f"  (best iteration: {best_iteration(model)})")
 
     mean_auc = np.mean(fold_aucs)
     std_auc = np.std(fold_aucs)
@@ -425,24 +810,34 @@ def k_fold_cross_validation(
         'fold_aucs': fold_aucs,
         'mean_auc': mean_auc,
         'std_auc': std_auc,
-        'fold_probas': fold_probas
+        'fold_probas': fold_probas,
+        'fold_models': fold_models
     }, model
 
 
+@profiled('LAYER 5')
 def plot_cv_roc_curves(fold_probas: list, n_splits: int = 5) -> None:
     """
     Plot individual fold ROC curves overlaid with the mean ROC curve.
 
+    Fold curves and AUCs use the fold's sample weights when present, so
+    the title matches the CV AUC printed by k_fold_cross_validation().
+
     Args:
-        fold_probas : List of (y_val_true, y_val_proba) tuples from cross_validate_xgboost().
+        fold_probas : List of (y_val_true, y_val_proba[, w_val]) tuples from
+                      k_fold_cross_validation().
         n_splits    : Number of folds (for labeling).
     """
+    if not _plots_enabled():
+        return
+
     fig, ax = plt.subplots(figsize=(9, 5))
     aucs = []
 
-    for fold, (y_val, y_proba) in enumerate(fold_probas, start=1):
-        fpr, tpr, _ = roc_curve(y_val, y_proba)
-        auc = roc_auc_score(y_val, y_proba)
+    for fold, (y_val, y_proba, *w_val) in enumerate(fold_probas, start=1):
+        w_val = w_val[0] if w_val else None
+        fpr, tpr, _ = roc_curve(y_val, y_proba, sample_weight=w_val)
+        auc = roc_auc_score(y_val, y_proba, sample_weight=w_val)
         aucs.append(auc)
         ax.plot(fpr, tpr, alpha=0.35, lw=1.2,
                 label=f'Fold {fold} (AUC={auc:.3f})')
@@ -457,9 +852,10 @@ def plot_cv_roc_curves(fold_probas: list, n_splits: int = 5) -> None:
                  fontsize=13, fontweight='bold', pad=12)
     ax.legend(fontsize=9, framealpha=0.9, loc='lower right')
     plt.tight_layout()
-    plt.show()
+    _finish_figure(fig, 'cv_roc_curves')
 
 
+@profiled('LAYER 5')
 def probabilities_histogram(data_test: pd.DataFrame, threshold: float) -> None:
     """
     Plot the distribution of predicted PDs for defaults vs. non-defaults.
@@ -468,7 +864,10 @@ def probabilities_histogram(data_test: pd.DataFrame, threshold: float) -> None:
         data_test (pd.DataFrame): Test set with 'default_proba' and 'BAD' columns.
         threshold (float): Classification threshold.
     """
-    plt.figure(figsize=(10, 5))
+    if not _plots_enabled():
+        return
+
+    fig = plt.figure(figsize=(10, 5))
     plt.hist(data_test[data_test['BAD'] == 0]['default_proba'], density=True, bins=15, alpha=0.6, color='skyblue', label='No Default')
     plt.hist(data_test[data_test['BAD'] == 1]['default_proba'], density=True, bins=15, alpha=0.6, color='#265393', label='Default')
     plt.axvline(x=threshold, color='red', linestyle='--', linewidth=2, label=f'Threshold = {threshold:.4f}')
@@ -476,14 +875,18 @@ def probabilities_histogram(data_test: pd.DataFrame, threshold: float) -> None:
     plt.title('Distribution of Predicted PDs by Actual Outcome', fontsize=13, fontweight='bold', pad=12)
     plt.legend(fontsize=10, framealpha=0.9)
     plt.tight_layout()
-    plt.show()
+    _finish_figure(fig, 'pd_histogram')
 
 
+@profiled('LAYER 5')
 def pd_distribution(data_test: pd.DataFrame) -> None:
     """
     Plot the overall distribution (density) of predicted PDs.
     """
-    plt.figure(figsize=(10, 5))
+    if not _plots_enabled():
+        return
+
+    fig = plt.figure(figsize=(10, 5))
 
     sns.kdeplot(
         data=data_test,
@@ -496,7 +899,7 @@ def pd_distribution(data_test: pd.DataFrame) -> None:
     plt.xlabel('Predicted Probability of Default (PD)')
     plt.title('Distribution of Predicted PDs')
     plt.tight_layout()
-    plt.show()
+    _finish_figure(fig, 'pd_density')
 
 
 # ══════════════════════════════════════════════════════════════════
@@ -622,11 +1025,129 @@ def outstanding_balance(principal: float | pd.Series, annual_rate: float, months
     return balance
 
 
+# Basel IRB parameters for retail residential mortgages
+IRB_CORRELATION = 0.15
+IRB_CONFIDENCE = 0.999
+IRB_PD_FLOOR = 0.0003
+
+
+def irb_capital_requirement(
+    pd_: np.ndarray,
+    lgd: np.ndarray,
+    correlation: float = IRB_CORRELATION,
+    pd_floor: float = IRB_PD_FLOOR
+) -> np.ndarray:
+    """
+    Basel IRB capital requirement K for residential mortgages.
+
+    Asymptotic single-risk-factor formula (no maturity adjustment for
+    retail exposures):
+        K = LGD × Φ[(Φ⁻¹(PD) + √R · Φ⁻¹(0.999)) / √(1 − R)] − PD × LGD
+
+    Args:
+        pd_         (np.ndarray): Probability of default per loan.
+        lgd         (np.ndarray): Loss given default per loan.
+        correlation (float)     : Asset correlation R (0.15 for mortgages).
+        pd_floor    (float)     : Regulatory PD floor.
+
+    Returns:
+        np.ndarray: K as a fraction of EAD, one per loan.
+    """
+    pd_ = np.clip(pd_, pd_floor, 1.0)
+    conditional_pd = norm.cdf(
+        (norm.ppf(pd_) + np.sqrt(correlation) * norm.ppf(IRB_CONFIDENCE))
+        / np.sqrt(1 - correlation)
+    )
+    return np.maximum(lgd * (conditional_pd - pd_), 0.0)
+
+
+def risk_weighted_assets(k: np.ndarray, ead: np.ndarray) -> np.ndarray:
+    """Risk-weighted assets: RWA = K × 12.5 × EAD."""
+    return k * 12.5 * ead
+
+
 # ══════════════════════════════════════════════════════════════════
 # LAYER 7 — EL COMPUTATION
 # ══════════════════════════════════════════════════════════════════
 
-def compute_el(data_test: pd.DataFrame, best_thr: float, haircut: float) -> pd.DataFrame:
+EL_COLUMNS = ['LGD', 'EL_pct', 'EL_amount', 'model_prediction', 'K', 'RWA', 'capital']
+
+
+def allocate_el_buffers(n: int) -> dict[str, np.ndarray]:
+    """
+    Preallocated output arrays for el_columns().
+
+    Allocate once for the largest chunk and pass to every call to avoid
+    per-chunk allocations; shorter chunks use a leading slice.
+
+    Args:
+        n (int): Rows per buffer.
+
+    Returns:
+        dict[str, np.ndarray]: One float64 array per EL column
+                               (int64 for model_prediction).
+    """
+    buffers = {col: np.empty(n) for col in EL_COLUMNS}
+    buffers['model_prediction'] = np.empty(n, dtype=np.int64)
+    return buffers
+
+
+def el_columns(
+    default_proba: np.ndarray,
+    ead: np.ndarray,
+    property_value: np.ndarray,
+    best_thr: float,
+    haircut: float,
+    out: dict[str, np.ndarray] | None = None
+) -> dict[str, np.ndarray]:
+    """
+    Columnar compute_el(): EL components written into preallocated arrays.
+
+    Same formulas as lgd_hipotecario(), irb_capital_requirement() and
+    risk_weighted_assets(), evaluated with in-place ufuncs so no
+    DataFrame is copied and no per-column temporaries are kept.
+
+    Args:
+        default_proba  (np.ndarray)      : PD per loan.
+        ead            (np.ndarray)      : Exposure at default (MORTDUE).
+        property_value (np.ndarray)      : Appraised property value (VALUE).
+        best_thr       (float)           : Optimal classification threshold.
+        haircut        (float)           : Foreclosure cost fraction.
+        out            (dict | None)     : Buffers from allocate_el_buffers();
+                                           allocated when None.
+
+    Returns:
+        dict[str, np.ndarray]: EL_COLUMNS arrays (views into out).
+    """
+    n = len(default_proba)
+    out = allocate_el_buffers(n) if out is None else {col: buf[:n] for col, buf in out.items()}
+
+    # LGD = clip(1 - min(EAD, VALUE × (1 - haircut)) / EAD, 0, 1)
+    lgd = out['LGD']
+    np.multiply(property_value, 1 - haircut, out=lgd)
+    np.minimum(ead, lgd, out=lgd)
+    np.divide(lgd, ead, out=lgd)
+    np.subtract(1.0, lgd, out=lgd)
+    np.clip(lgd, 0, 1, out=lgd)
+
+    np.multiply(default_proba, lgd, out=out['EL_pct'])
+    np.multiply(out['EL_pct'], ead, out=out['EL_amount'])
+    np.greater_equal(default_proba, best_thr, out=out['model_prediction'], casting='unsafe')
+
+    out['K'][:] = irb_capital_requirement(default_proba, lgd)
+    np.multiply(out['K'], 12.5, out=out['RWA'])
+    np.multiply(out['RWA'], ead, out=out['RWA'])
+    np.multiply(out['K'], ead, out=out['capital'])
+    return out
+
+
+@profiled('LAYER 7')
+def compute_el(
+    data_test: pd.DataFrame,
+    best_thr: float,
+    haircut: float,
+    inplace: bool = False
+) -> pd.DataFrame:
     """
     Compute Expected Loss components and model classification for each loan.
 
@@ -635,25 +1156,31 @@ def compute_el(data_test: pd.DataFrame, best_thr: float, haircut: float) -> pd.D
         LGD = lgd_hipotecario(MORTDUE, VALUE)   [composes net_recovery, actual_recovery]
         EAD = MORTDUE                            [outstanding balance, observed]
 
-    Also assigns binary model_prediction using best_thr from curva_roc().
+    Also assigns binary model_prediction using best_thr from curva_roc(),
+    and Basel IRB capital: K (irb_capital_requirement), RWA and the
+    capital amount K × EAD.
+
+    Thin wrapper over el_columns().
 
     Args:
         data_test (pd.DataFrame): Test set with default_proba already added.
         best_thr  (float)       : Optimal classification threshold.
         haircut   (float)       : Foreclosure cost fraction.
+        inplace   (bool)        : Add the columns to data_test instead of a copy.
     Returns:
         pd.DataFrame: Input DataFrame with LGD, EL_pct, EL_amount,
-                      and model_prediction columns added.
+                      model_prediction, K, RWA and capital columns added.
     """
-    df = data_test.copy()
-    df['LGD'] = lgd_hipotecario(
-        ead=df['MORTDUE'].values,
-        property_value=df['VALUE'].values,
+    df = data_test if inplace else data_test.copy()
+    columns = el_columns(
+        default_proba=df['default_proba'].to_numpy(dtype=float),
+        ead=df['MORTDUE'].to_numpy(dtype=float),
+        property_value=df['VALUE'].to_numpy(dtype=float),
+        best_thr=best_thr,
         haircut=haircut
     )
-    df['EL_pct'] = df['default_proba'] * df['LGD']
-    df['EL_amount'] = df['default_proba'] * df['LGD'] * df['MORTDUE']
-    df['model_prediction'] = (df['default_proba'] >= best_thr).astype(int)
+    for col, values in columns.items():
+        df[col] = values
     return df
 
 
@@ -661,10 +1188,85 @@ def compute_el(data_test: pd.DataFrame, best_thr: float, haircut: float) -> pd.D
 # LAYER 8 — PORTFOLIO OUTPUTS
 # ══════════════════════════════════════════════════════════════════
 
+def portfolio_totals(
+    loan: np.ndarray,
+    ead: np.ndarray,
+    default_proba: np.ndarray,
+    el_amount: np.ndarray,
+    model_prediction: np.ndarray,
+    bad: np.ndarray,
+    annual_rate: float,
+    months: int,
+    payments_made: int = 60
+) -> dict:
+    """
+    Additive sums behind compute_portfolio_metrics(), from NumPy buffers.
+
+    Amortized value and outstanding balance are linear in the principal,
+    so interest and balance totals are a per-unit factor times a masked
+    sum of LOAN; no per-loan columns are built. Sums add across chunks.
+
+    Args:
+        loan             (np.ndarray): Original loan amounts.
+        ead              (np.ndarray): Exposure at default (MORTDUE).
+        default_proba    (np.ndarray): PD per loan.
+        el_amount        (np.ndarray): EL per loan.
+        model_prediction (np.ndarray): 1 = reject, 0 = approve.
+        bad              (np.ndarray): Observed default flag.
+        annual_rate      (float)     : Annual interest rate.
+        months           (int)       : Total number of monthly payments.
+        payments_made    (int)       : Month at which a missed default is lost.
+
+    Returns:
+        dict: n, ead, el, pd_sum, pd_ead, new_portfolio, missed_balance
+              and opportunity_cost.
+    """
+    approved = model_prediction == 0
+    bad = bad == 1
+    interest_factor = amortization(1.0, annual_rate, months) - 1.0
+    balance_factor = outstanding_balance(1.0, annual_rate, months, payments_made)
+    return {
+        'n'               : len(loan),
+        'ead'             : np.nansum(ead),
+        'el'              : np.nansum(el_amount),
+        'pd_sum'          : np.nansum(default_proba),
+        'pd_ead'          : np.nansum(default_proba * ead),
+        'new_portfolio'   : loan[approved].sum(),
+        'missed_balance'  : balance_factor * loan[approved & bad].sum(),
+        'opportunity_cost': interest_factor * loan[~approved & ~bad].sum(),
+    }
+
+
+def metrics_from_totals(totals: dict, loss_rate: float = 0.35) -> dict:
+    """
+    Portfolio metrics from (possibly merged) portfolio_totals().
+
+    Args:
+        totals    (dict) : Output of portfolio_totals(), or a sum of several.
+        loss_rate (float): Loss fraction applied to missed defaults.
+
+    Returns:
+        dict: Same keys as compute_portfolio_metrics().
+    """
+    return {
+        'ead'             : totals['ead'],
+        'new_portfolio'   : totals['new_portfolio'],
+        'el'              : totals['el'],
+        'actual_loss'     : totals['missed_balance'] * loss_rate,
+        'opportunity_cost': totals['opportunity_cost'],
+        'mean_pd'         : totals['pd_sum'] / totals['n'],
+        'weighted_pd'     : totals['pd_ead'] / totals['ead'],
+    }
+
+
+@profiled('LAYER 8')
 def compute_portfolio_metrics(data_test: pd.DataFrame, annual_rate: float, months: int) -> dict:
     """
     Compute all portfolio-level metrics into a single dictionary.
 
+    Thin wrapper over portfolio_totals() and metrics_from_totals(); the
+    input DataFrame is read, not modified.
+
     Args:
         data_test (pd.DataFrame): Test set with computed EL components.
         annual_rate (float): Annual interest rate.
@@ -673,31 +1275,17 @@ def compute_portfolio_metrics(data_test: pd.DataFrame, annual_rate: float, month
     Returns:
         dict: Dictionary containing all portfolio metrics.
     """
-    # Add the amortized loan values to the DataFrame for loss calculations
-    data_test['amortized_loans'] = amortization(
-        principal=data_test['LOAN'], annual_rate=annual_rate, months=months)
-    
-    # Interest generated by loans
-    data_test['interest_generated'] = data_test['amortized_loans'] - data_test['LOAN']
-
-    # Outstanding balance at month t
-    data_test['outstanding_balance'] = outstanding_balance(
-        principal=data_test['LOAN'],
+    totals = portfolio_totals(
+        loan=data_test['LOAN'].to_numpy(dtype=float),
+        ead=data_test['MORTDUE'].to_numpy(dtype=float),
+        default_proba=data_test['default_proba'].to_numpy(dtype=float),
+        el_amount=data_test['EL_amount'].to_numpy(dtype=float),
+        model_prediction=data_test['model_prediction'].to_numpy(),
+        bad=data_test['BAD'].to_numpy(),
         annual_rate=annual_rate,
-        months=months,
-        payments_made=60
+        months=months
     )
-
-    new_portfolio = new_portfolio_value(data_test)
-    return {
-        'ead'             : portfolio_ead(data_test),
-        'new_portfolio'   : new_portfolio,
-        'el'              : expected_loss(data_test),
-        'actual_loss'     : actual_loss(data_test) * 0.35,  # Adjusted for average LGD of 35%
-        'opportunity_cost': opportunity_cost(data_test),
-        'mean_pd'         : mean_pd(data_test),
-        'weighted_pd'     : weighted_pd(data_test),
-    }
+    return metrics_from_totals(totals)
 
 
 def portfolio_summary(data_test: pd.DataFrame, annual_rate: float, months: int) -> None:
@@ -721,6 +1309,109 @@ def portfolio_summary(data_test: pd.DataFrame, annual_rate: float, months: int)
     print(f"Opportunity Cost:               ${m['opportunity_cost']:,.2f}  ({m['opportunity_cost'] / new_portfolio:.2%})\n")
 
 
+@profiled('LAYER 8')
+def threshold_sweep(
+    data_test: pd.DataFrame,
+    annual_rate: float,
+    months: int,
+    payments_made: int = 60,
+    loss_rate: float = 0.35
+) -> pd.DataFrame:
+    """
+    Portfolio outcomes for every candidate classification threshold.
+
+    Sorts the book by PD once and evaluates all thresholds with cumulative
+    sums (O(n log n)) instead of re-filtering the DataFrame per threshold.
+    A loan is rejected when default_proba >= threshold, as in compute_el().
+
+    Per threshold:
+        new_portfolio    = sum of LOAN over approved loans
+        actual_loss      = outstanding balance of approved defaults × loss_rate
+        opportunity_cost = interest of rejected non-defaults
+        interest_earned  = interest of approved non-defaults
+        profit           = interest_earned - actual_loss
+        EL_approved      = EL_amount over approved loans (if present)
+        TPR / FPR        = share of defaults / non-defaults rejected
+
+    Args:
+        data_test     (pd.DataFrame): Book with default_proba, BAD and LOAN.
+        annual_rate   (float)       : Annual interest rate.
+        months        (int)         : Total number of monthly payments.
+        payments_made (int)         : Month at which the outstanding balance is lost.
+        loss_rate     (float)       : Loss fraction applied to missed defaults.
+
+    Returns:
+        pd.DataFrame: One row per candidate threshold, ascending. The last
+                      row (threshold = inf) approves the whole book.
+    """
+    proba = data_test['default_proba'].to_numpy()
+    order = np.argsort(proba, kind='stable')
+    p = proba[order]
+    bad = data_test['BAD'].to_numpy()[order] == 1
+    loan = data_test['LOAN'].to_numpy(dtype=float)[order]
+
+    interest = amortization(loan, annual_rate, months) - loan
+    balance = outstanding_balance(loan, annual_rate, months, payments_made)
+
+    def prefix(values: np.ndarray) -> np.ndarray:
+        return np.concatenate(([0.0], np.cumsum(values)))
+
+    cum_loan = prefix(loan)
+    cum_loss = prefix(np.where(bad, balance, 0.0))
+    cum_good_interest = prefix(np.where(bad, 0.0, interest))
+    cum_bad = prefix(bad)
+    cum_el = prefix(data_test['EL_amount'].to_numpy()[order]) if 'EL_amount' in data_test else None
+
+    thresholds = np.append(np.unique(p), np.inf)
+    k = np.searchsorted(p, thresholds, side='left')   # number of approved loans
+
+    n_bad = cum_bad[-1]
+    n_good = len(p) - n_bad
+    interest_earned = cum_good_interest[k]
+    actual = cum_loss[k] * loss_rate
+
+    curve = pd.DataFrame({
+        'threshold'       : thresholds,
+        'n_approved'      : k,
+        'new_portfolio'   : cum_loan[k],
+        'actual_loss'     : actual,
+        'opportunity_cost': cum_good_interest[-1] - interest_earned,
+        'interest_earned' : interest_earned,
+        'profit'          : interest_earned - actual,
+        'TPR'             : (n_bad - cum_bad[k]) / n_bad,
+        'FPR'             : (n_good - (k - cum_bad[k])) / n_good,
+    })
+    if cum_el is not None:
+        curve['EL_approved'] = cum_el[k]
+    return curve
+
+
+def profit_threshold(
+    data_test: pd.DataFrame,
+    annual_rate: float,
+    months: int,
+    **kwargs
+) -> tuple[float, pd.DataFrame]:
+    """
+    Profit-maximizing threshold and the full sweep curve.
+
+    Composes threshold_sweep().
+
+    Args:
+        data_test   (pd.DataFrame): Book with default_proba, BAD and LOAN.
+        annual_rate (float)       : Annual interest rate.
+        months      (int)         : Total number of monthly payments.
+        **kwargs                  : payments_made / loss_rate for threshold_sweep().
+
+    Returns:
+        tuple: (best threshold, sweep DataFrame).
+    """
+    curve = threshold_sweep(data_test, annual_rate, months, **kwargs)
+    best = curve['profit'].to_numpy().argmax()
+    return float(curve['threshold'].iloc[best]), curve
+
+
+@profiled('LAYER 8')
 def risk_bucket_table(data_test: pd.DataFrame) -> pd.DataFrame:
     """
     Segment the portfolio into four PD risk buckets and summarise EL metrics.
@@ -729,28 +1420,32 @@ def risk_bucket_table(data_test: pd.DataFrame) -> pd.DataFrame:
         data_test (pd.DataFrame): Output of compute_el().
 
     Returns:
-        pd.DataFrame: Summary table with n_creditos, EAD_total, EL_total,
-                      PD_promedio, LGD_promedio, and EL_pct per bucket.
+        pd.DataFrame: Summary table with n_loans, EAD, EL, Avg_PD, RWA,
+                      Capital, EL_pct and Capital_pct per bucket.
     """
-    df = data_test.copy()
-
-    # Crear 4 buckets por cuantiles
-    df['risk_bucket'] = pd.qcut(
-        df['default_proba'],
+    # Crear 4 buckets por cuantiles (grouping key only, no frame copy).
+    # Ranking first keeps four buckets when calibrated PDs have plateaus
+    # holding more than a quarter of the book (tied PDs may span buckets).
+    risk_bucket = pd.qcut(
+        data_test['default_proba'].rank(method='first'),
         q=4,
         labels=['Low', 'Medium', 'High', 'Very High']
-    )
+    ).rename('risk_bucket')
 
-    return df.groupby('risk_bucket', observed=True).agg(
+    return data_test.groupby(risk_bucket, observed=True).agg(
         n_loans=('EL_amount',     'count'),
         EAD=('MORTDUE',       'sum'),
         EL=('EL_amount',     'sum'),
         Avg_PD=('default_proba', 'mean'),
+        RWA=('RWA',           'sum'),
+        Capital=('capital',   'sum'),
     ).assign(
-        EL_pct=lambda x: x['EL'] / x['EAD']
+        EL_pct=lambda x: x['EL'] / x['EAD'],
+        Capital_pct=lambda x: x['Capital'] / x['EAD']
     )
 
 
+@profiled('LAYER 8')
 def model_validation(y_pred: pd.Series, y_test: pd.Series) -> None:
     """
     Print classification report and plot confusion matrix.
@@ -760,6 +1455,9 @@ def model_validation(y_pred: pd.Series, y_test: pd.Series) -> None:
         y_pred (pd.Series): Model binary predictions.
     """
     print(classification_report(y_test, y_pred))
+    if not _plots_enabled():
+        return
+
     ConfusionMatrixDisplay.from_predictions(
         y_test, y_pred,
         display_labels=['No Default', 'Default'],
@@ -767,10 +1465,16 @@ def model_validation(y_pred: pd.Series, y_test: pd.Series) -> None:
     )
     plt.title('Confusion Matrix')
     plt.tight_layout()
-    plt.show()
+    _finish_figure(plt.gcf(), 'confusion_matrix')
 
 
-def shap_analysis(model: XGBClassifier, X_test: pd.DataFrame, max_display: int = 15) -> None:
+@profiled('LAYER 8')
+def shap_analysis(
+    model: XGBClassifier,
+    X_test: pd.DataFrame,
+    max_display: int = 15,
+    shap_values: Any = None
+) -> None:
     """
     Generate SHAP feature importance plots for model interpretability.
 
@@ -782,19 +1486,28 @@ def shap_analysis(model: XGBClassifier, X_test: pd.DataFrame, max_display: int =
         model       (XGBClassifier): Fitted XGBoost model.
         X_test      (pd.DataFrame) : Test features.
         max_display (int)          : Number of top features to display.
+        shap_values (shap.Explanation, optional): Precomputed values for X_test
+                                     (e.g. from explain.ExplanationStore) to
+                                     skip running the explainer again.
     """
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer(X_test)
+    if not _plots_enabled():
+        return
+
+    if shap_values is None:
+        explainer = shap.TreeExplainer(model)
+        shap_values = explainer(X_test)
 
     shap.summary_plot(shap_values, X_test, plot_type='bar',
                       max_display=max_display,
-                      title='SHAP Feature Importance — Modelo PD Hipotecario')
+                      title='SHAP Feature Importance — Modelo PD Hipotecario',
+                      show=False)
+    _finish_figure(plt.gcf(), 'shap_importance')
 
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     shap.plots.beeswarm(shap_values, max_display=max_display, show=False)
     plt.title('SHAP Summary (Impact & Direction) — Modelo PD', fontsize=14)
     plt.tight_layout()
-    plt.show()
+    _finish_figure(fig, 'shap_beeswarm')
 
 
 # ══════════════════════════════════════════════════════════════════
@@ -808,7 +1521,16 @@ def main(
     target: str = 'BAD',
     haircut: float = 0.30,
     annual_rate: float = 11.5040,
-    months: int = 240
+    months: int = 240,
+    params_path: str | None = None,
+    bootstrap: str = 'weights',
+    model_dir: str | None = None,
+    plot_mode: str = 'show',
+    explain_path: str | None = None,
+    profile_path: str | None = None,
+    calibration: str | None = 'isotonic',
+    scorecard_path: str | None = None,
+    sensitivity_path: str | None = None
 ):
     # NOTE: Three-way split strategy
     # - Train (76%): model fitting
@@ -826,6 +1548,13 @@ def main(
     #   - LOAN is used to calculate the amortized value of the new portfolio after rejections
     # The model only works with people that already had or currently have a mortgage.
 
+    # 'save' renders figures to files in the background, 'off' skips them
+    set_plot_mode(plot_mode)
+
+    # Per-layer timing and memory, written as a Chrome trace
+    if profile_path is not None:
+        enable_profiling()
+
     # Data ingestion
     data = load_data(filename)
     data_holdout = load_data(filename_holdout)
@@ -847,6 +1576,13 @@ def main(
     model_validation(y_pred_logistic, y_test)
     curva_roc(y_pred_proba_logistic, y_test)
 
+    # Points scorecard on the same raw features (WOE bins + logistic fit)
+    if scorecard_path is not None:
+        from scorecard import Scorecard
+        scorecard = Scorecard().fit(X_train, y_train)
+        print(f"  Scorecard AUC: {roc_auc_score(y_test, -scorecard.score(X_test)):.4f}")
+        scorecard.save(scorecard_path)
+
     # Feature engineering
     data = feature_engineering(data)
 
@@ -857,46 +1593,126 @@ def main(
         drop_cols=['HOME_EQUITY', 'TOTAL_DEBT']
     )
 
-    # Bootstrap training data to increase sample size for XGBoost
-    X_train, y_train = bootstrap_training_data(X_train, y_train)
+    # Un-resampled training features for the drift reference
+    X_reference = X_train
+
+    # Bootstrap training data to increase sample size for XGBoost.
+    # 'weights' expresses the bootstrap as per-row draw counts;
+    # 'resample' materializes the 2x resampled rows as before.
+    sample_weight = None
+    if bootstrap == 'weights':
+        sample_weight = bootstrap_weights(X_train)
+    elif bootstrap == 'resample':
+        X_train, y_train = bootstrap_training_data(X_train, y_train)
+    else:
+        raise ValueError(f"Unknown bootstrap mode: {bootstrap}")
 
     # Cross validation (on bootstrapped training set)
     print("5-Fold Cross Validation")
 
+    # Tuned hyperparameters from tuning.py, if available
+    params = None
+    if params_path is not None:
+        from tuning import load_best_params
+        params = load_best_params(params_path)
+
     cv_results, model = k_fold_cross_validation(
-        X_train, y_train, n_splits=5, random_state=29)
+        X_train, y_train, n_splits=5, random_state=29, params=params,
+        sample_weight=sample_weight)
 
     plot_cv_roc_curves(cv_results['fold_probas'], n_splits=5)
 
     # Final model results on validation set
     print("\n Validation Results")
+    print(f"  Best iteration: {best_iteration(model)}")
     _, y_pred_proba_final = model_predictions(model, X_val)
     best_thr = curva_roc(y_pred_proba_final, y_val)
+    raw_thr = best_thr
+
+    # Raw scores come from a model trained on bootstrapped data; map them to
+    # calibrated PDs. The calibrator and the threshold (re-selected on the
+    # calibrated scale) are fitted on one half of the validation rows; the
+    # calibration report, EL and validation metrics below use the other half.
+    calibrator = None
+    if calibration is not None:
+        from calibration import PDCalibrator, calibration_report
+        X_cal, X_val, y_cal, y_val = train_test_split(
+            X_val, y_val, test_size=0.5, random_state=29, stratify=y_val)
+        _, raw_cal = model_predictions(model, X_cal)
+        calibrator = PDCalibrator(calibration).fit(raw_cal, y_cal)
+        best_thr = optimal_threshold(calibrator.apply(raw_cal), y_cal)['best_thr']
+        _, raw_val = model_predictions(model, X_val)
+        y_pred_proba_final = calibrator.apply(raw_val)
+        print(f"\n PD Calibration ({calibration}, held-out validation half)")
+        print(calibration_report(y_val, raw_val, y_pred_proba_final))
+
+    # Drift reference: training feature bins plus validation PD bins
+    reference = build_reference(X_reference, y_pred_proba_final, y_val)
+
+    # Persist the scoring artifact used by service.py
+    if model_dir is not None:
+        from scoring import save_scoring_model
+        save_scoring_model(model, model_dir, best_thr, haircut)
+        save_reference(reference, model_dir)
+        if calibrator is not None:
+            calibrator.save(model_dir)
 
     # Expected Loss computation
     data_test = pd.concat([X_val, y_val], axis=1)
     data_test['default_proba'] = y_pred_proba_final
-    data_test = compute_el(data_test, best_thr, haircut)
+    data_test = compute_el(data_test, best_thr, haircut, inplace=True)
 
     # Outputs
     portfolio_summary(data_test, annual_rate, months)
+    profit_thr, _ = profit_threshold(data_test, annual_rate, months)
+    print(f"Profit-maximizing threshold:    {profit_thr:.4f}  (ROC threshold: {best_thr:.4f})\n")
     print(risk_bucket_table(data_test))
+
+    # EL / capital / losses across haircuts × house-price shocks at the base rate
+    if sensitivity_path is not None:
+        from sensitivity import sensitivity_cube, cube_frame
+        cube = cube_frame(sensitivity_cube(data_test, rates=[annual_rate], months=months))
+        cube.to_csv(sensitivity_path)
+        print("\n EL % sensitivity (rows: haircut, columns: house-price shock)")
+        print(cube['EL_pct'].xs(annual_rate, level='rate').unstack('shock'))
     model_validation(data_test['model_prediction'], y_val)
-    shap_analysis(model, X_val)
+
+    # Persist per-loan SHAP values for reason-code lookups and reuse them for the plots
+    val_shap = None
+    if explain_path is not None:
+        from explain import ExplanationStore, to_explanation
+        store = ExplanationStore.from_model(model, X_val)
+        store.save(explain_path)
+        val_shap = to_explanation(store.values, store.base_value, X_val)
+    shap_analysis(model, X_val, shap_values=val_shap)
     probabilities_histogram(data_test, best_thr)
     pd_distribution(data_test)
 
     # Checking results on holdout set (never seen during training or feature engineering)
     print("\n Test Results")
 
-    # Feature engineering on holdout set (using same transformations as training)
-    X_holdout = feature_engineering(data_holdout).drop(columns=[target, 'HOME_EQUITY', 'TOTAL_DEBT'])
+    # Champion (final XGBoost) and challengers scored together: the holdout
+    # is feature-engineered once and every model reads the same matrix
+    from challenger import ChampionChallenger, FoldEnsemble
+    engine = ChampionChallenger(
+        models={
+            'xgboost'      : model,
+            'xgboost_folds': FoldEnsemble(cv_results['fold_models']),
+            'logistic'     : logistic_model,
+        },
+        champion='xgboost',
+        thresholds={'xgboost': best_thr, 'xgboost_folds': raw_thr, 'logistic': 0.5},
+        haircut=haircut,
+        calibrators={'xgboost': calibrator} if calibrator is not None else None
+    )
+    holdout_features, holdout_pds = engine.score_batch(data_holdout)
+    X_holdout = holdout_features.drop(columns=[target, 'HOME_EQUITY', 'TOTAL_DEBT'])
     y_holdout = data_holdout[target]
 
     # Predictions and evaluation on holdout set
-    _, y_pred_proba_holdout = model_predictions(model, X_holdout)
+    y_pred_proba_holdout = holdout_pds['xgboost']
     data_holdout['default_proba'] = y_pred_proba_holdout
-    data_holdout = compute_el(data_holdout, best_thr, haircut)
+    data_holdout = compute_el(data_holdout, best_thr, haircut, inplace=True)
 
     # Outputs for holdout set
     curva_roc(y_pred_proba_holdout, y_holdout)
@@ -906,6 +1722,22 @@ def main(
     probabilities_histogram(data_holdout, best_thr)
     pd_distribution(data_holdout)
 
+    print("\n Champion / Challenger (holdout)")
+    print(engine.compare(holdout_features, holdout_pds, target))
+
+    # Population stability of the holdout against training
+    print("\n Drift Monitoring (holdout vs. training)")
+    monitor = DriftMonitor(reference)
+    monitor.update(X_holdout, y_pred_proba_holdout, y_holdout)
+    drift_summary(monitor)
+
+    wait_for_plots()
+
+    if profile_path is not None:
+        print("\n Stage Profile")
+        print(profile_summary())
+        write_chrome_trace(profile_path)
+
 
 if __name__ == '__main__':
     results = main()
\ No newline at end of file
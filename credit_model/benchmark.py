@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import multiprocessing
+import numpy as np
+import pandas as pd
+import xgboost
+from typing import Callable
+
+from Credit_Model import (
+    load_data,
+    feature_engineering,
+    bootstrap_training_data,
+    bootstrap_weights,
+    k_fold_cross_validation,
+    train_xgboost,
+    model_predictions,
+    compute_el,
+    risk_bucket_table,
+)
+from scoring import predict_pd
+
+# ══════════════════════════════════════════════════════════════════
+# BENCHMARK SUITE
+# Times and memory-profiles each pipeline layer on synthetic
+# HMEQ-like books of increasing size and writes JSON results that
+# can be compared run-to-run for regressions. CPU only.
+#
+# Timings are the min / median of several untraced runs. Memory is the
+# peak resident set size growth of one extra run in a forked child
+# process, so native allocations (XGBoost, NumPy) are included and
+# each layer starts from a fresh high-water mark.
+#
+#   python benchmark.py --sizes 10000 1000000 --output bench.json
+#   python benchmark.py --sizes 10000 --compare bench.json
+# ══════════════════════════════════════════════════════════════════
+
+CONTINUOUS_COLS = ['LOAN', 'MORTDUE', 'VALUE', 'YOJ', 'CLAGE', 'DEBTINC']
+
+
+def synthetic_book(
+    n: int,
+    source: str = 'hmeq_cleaned.csv',
+    noise: float = 0.05,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Synthetic HMEQ-like book that keeps the real column distributions.
+
+    Rows are resampled from the cleaned data, so joint structure
+    (including BAD and the JOB one-hot flags) is preserved, and the
+    continuous columns get multiplicative log-normal jitter so the
+    book is not just repeated rows.
+
+    Args:
+        n      (int)  : Number of rows.
+        source (str)  : Cleaned CSV to resample from.
+        noise  (float): Log-scale standard deviation of the jitter.
+        seed   (int)  : Reproducibility seed.
+
+    Returns:
+        pd.DataFrame: Book with hmeq_cleaned.csv columns.
+    """
+    base = load_data(source)
+    rng = np.random.default_rng(seed)
+    book = base.iloc[rng.integers(0, len(base), size=n)].reset_index(drop=True)
+    for col in CONTINUOUS_COLS:
+        book[col] = book[col].to_numpy() * rng.lognormal(0.0, noise, size=n)
+    return book
+
+
+def _peak_rss_child(conn, fn: Callable, args: tuple, kwargs: dict) -> None:
+    import resource
+    start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn(*args, **kwargs)
+    conn.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start)
+    conn.close()
+
+
+def peak_rss_mb(fn: Callable, *args, **kwargs) -> float | None:
+    """
+    Peak RSS growth (MB) of one call of fn, run in a forked child.
+
+    The child inherits the inputs without copying them and starts with
+    its own high-water mark, so the result is the memory fn itself
+    touched, native allocations included.
+
+    Returns:
+        float | None: Growth in MB, or None where fork is unavailable.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    ctx = multiprocessing.get_context('fork')
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_peak_rss_child, args=(send, fn, args, kwargs))
+    proc.start()
+    send.close()
+    try:
+        grown = recv.recv()
+    except EOFError:
+        raise RuntimeError(f"Memory run of {getattr(fn, '__name__', fn)} failed") from None
+    finally:
+        proc.join()
+    unit = 1 if sys.platform == 'darwin' else 1024   # ru_maxrss: bytes on macOS, KiB elsewhere
+    return grown * unit / 2**20
+
+
+def measure(
+    layer: str,
+    n_rows: int,
+    fn: Callable,
+    *args,
+    repeat: int = 3,
+    **kwargs
+) -> tuple[dict, object]:
+    """
+    Time fn over several runs and record its peak RSS growth.
+
+    Args:
+        layer  (str)     : Layer name for the report.
+        n_rows (int)     : Rows processed.
+        fn     (Callable): Function to benchmark.
+        repeat (int)     : Timed runs; min and median are reported.
+
+    Returns:
+        tuple: (result record, fn's return value from the last run).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    seconds = min(times)
+    peak = peak_rss_mb(fn, *args, **kwargs)
+
+    record = {
+        'layer'      : layer,
+        'n_rows'     : n_rows,
+        'seconds'    : seconds,
+        'median_s'   : statistics.median(times),
+        'repeat'     : repeat,
+        'rows_per_s' : n_rows / seconds if seconds else float('inf'),
+        'peak_rss_mb': peak,
+    }
+    mem = 'n/a' if peak is None else f"{peak:.1f} MB"
+    print(f"  {layer:<26} {n_rows:>10,} rows  {seconds:9.3f}s  "
+          f"(median {record['median_s']:.3f}s)  {mem:>10}")
+    return record, out
+
+
+def run_size(
+    n: int,
+    train_rows: int = 200_000,
+    n_estimators: int = 100,
+    repeat: int = 3
+) -> list[dict]:
+    """
+    Benchmark every layer on one synthetic book size.
+
+    Training layers use at most train_rows rows and a reduced number of
+    trees so large sizes remain practical; scoring layers use all rows.
+
+    Args:
+        n            (int): Book size.
+        train_rows   (int): Row cap for the training layers.
+        n_estimators (int): Trees per model in the training layers.
+        repeat       (int): Timed runs per layer.
+
+    Returns:
+        list[dict]: One record per layer.
+    """
+    print(f"\n Book size {n:,}")
+    records = []
+    book = synthetic_book(n)
+
+    rec, data = measure('feature_engineering', n, feature_engineering, book, repeat=repeat)
+    records.append(rec)
+
+    X = data.drop(columns=['BAD', 'HOME_EQUITY', 'TOTAL_DEBT'])
+    y = data['BAD']
+    m = min(n, train_rows)
+    X_train, y_train = X.iloc[:m], y.iloc[:m]
+    params = {'n_estimators': n_estimators}
+
+    rec, _ = measure('bootstrap_training_data', m, bootstrap_training_data, X_train, y_train,
+                     repeat=repeat)
+    records.append(rec)
+    rec, weights = measure('bootstrap_weights', m, bootstrap_weights, X_train, repeat=repeat)
+    records.append(rec)
+
+    rec, _ = measure('k_fold_cross_validation', m, k_fold_cross_validation,
+                     X_train, y_train, n_splits=3, random_state=29,
+                     params=params, sample_weight=weights, repeat=repeat)
+    records.append(rec)
+
+    # Scoring model: early stopping watches the last fifth of the
+    # training slice, held out from the fit.
+    k = max(m // 5, 1)
+    model = train_xgboost(X.iloc[:m - k], y.iloc[:m - k], X.iloc[m - k:m], y.iloc[m - k:m],
+                          random_state=29, params=params)
+
+    rec, (_, proba) = measure('model_predictions', n, model_predictions, model, X,
+                                 repeat=repeat)
+    records.append(rec)
+    rec, _ = measure('predict_pd', n, predict_pd, model, X, repeat=repeat)
+    records.append(rec)
+
+    data['default_proba'] = proba
+    rec, scored = measure('compute_el', n, compute_el, data, 0.3, 0.30, repeat=repeat)
+    records.append(rec)
+    rec, _ = measure('risk_bucket_table', n, risk_bucket_table, scored, repeat=repeat)
+    records.append(rec)
+
+    return records
+
+
+def environment() -> dict:
+    """Machine and library versions stored with the results."""
+    return {
+        'python'   : sys.version.split()[0],
+        'numpy'    : np.__version__,
+        'pandas'   : pd.__version__,
+        'xgboost'  : xgboost.__version__,
+        'platform' : platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(
+    baseline: dict,
+    current: dict,
+    tolerance: float = 0.20,
+    min_seconds: float = 0.05,
+    min_mb: float = 16.0
+) -> list[str]:
+    """
+    Layers whose time or memory grew by more than tolerance.
+
+    An increase is only flagged when it also exceeds an absolute floor,
+    so timer and allocator noise on tiny layers is not reported.
+
+    Args:
+        baseline    (dict) : Earlier results JSON.
+        current     (dict) : New results JSON.
+        tolerance   (float): Allowed relative increase.
+        min_seconds (float): Smallest time increase (s) that counts.
+        min_mb      (float): Smallest peak RSS increase (MB) that counts.
+
+    Returns:
+        list[str]: Human-readable regression lines (empty if none).
+    """
+    floors = {'seconds': min_seconds, 'peak_rss_mb': min_mb}
+    old = {(r['layer'], r['n_rows']): r for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        ref = old.get((r['layer'], r['n_rows']))
+        if ref is None:
+            continue
+        for key, floor in floors.items():
+            before, after = ref.get(key), r.get(key)
+            if before is None or after is None or before <= 0:
+                continue
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append(f"{r['layer']} @ {r['n_rows']:,}: {key} "
+                                   f"{before:.3f} -> {after:.3f} "
+                                   f"(+{after / before - 1:.0%})")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Credit_Model pipeline benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--train-rows', type=int, default=200_000)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', default=None, help='Baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.20)
+    parser.add_argument('--min-seconds', type=float, default=0.05)
+    parser.add_argument('--min-mb', type=float, default=16.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.train_rows, args.n_estimators, args.repeat))
+
+    report = {'environment': environment(), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance,
+                                  args.min_seconds, args.min_mb)
+        print("\n".join(regressions) if regressions else "No regressions")
+        sys.exit(1 if regressions else 0)
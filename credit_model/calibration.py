@@ -0,0 +1,188 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy.special import expit, logit
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, log_loss
+
+from Credit_Model import IRB_PD_FLOOR
+
+# ══════════════════════════════════════════════════════════════════
+# PD CALIBRATION
+# The XGBoost score is trained on bootstrapped data and is a ranking,
+# not a calibrated PD. A calibrator is fitted on the validation fold
+# and stored next to the model (calibration.json):
+#   isotonic — monotone piecewise-linear map (breakpoints + values)
+#   binning  — observed default rate per score quantile bin (step map)
+#   platt    — PD = σ(a · logit(score) + b), closed form
+# Isotonic and binning are applied with one np.searchsorted over the
+# breakpoints (O(log k) per score); Platt is O(1).
+# Calibrated PDs are kept inside [PD_MIN, PD_MAX]: a PD of exactly 0
+# zeroes EL and capital, and a PD of exactly 1 gives K = 0 in the IRB
+# formula.
+# ══════════════════════════════════════════════════════════════════
+
+CALIBRATION_METHODS = ('isotonic', 'binning', 'platt')
+SCORE_EPS = 1e-6
+PD_MIN = IRB_PD_FLOOR
+PD_MAX = 1 - IRB_PD_FLOOR
+
+
+class PDCalibrator:
+    """
+    Monotone map from raw model scores to calibrated PDs.
+
+    Args:
+        method (str): 'isotonic', 'binning' or 'platt'.
+        bins   (int): Quantile bins for 'binning'.
+    """
+
+    def __init__(self, method: str = 'isotonic', bins: int = 20):
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f"Unknown calibration method: {method}")
+        self.method = method
+        self.bins = bins
+        self.breakpoints = np.empty(0)
+        self.values = np.empty(0)
+        self.coef = (1.0, 0.0)
+
+    def fit(
+        self,
+        scores: np.ndarray,
+        y: np.ndarray,
+        sample_weight: np.ndarray | None = None
+    ) -> 'PDCalibrator':
+        """
+        Fit the map on held-out scores.
+
+        Args:
+            scores        (np.ndarray)       : Raw model PDs (validation fold).
+            y             (np.ndarray)       : Observed defaults.
+            sample_weight (np.ndarray | None): Optional per-row weights.
+
+        Returns:
+            PDCalibrator: self.
+        """
+        scores = np.asarray(scores, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        if self.method == 'isotonic':
+            iso = IsotonicRegression(y_min=PD_MIN, y_max=PD_MAX, out_of_bounds='clip')
+            iso.fit(scores, y, sample_weight=sample_weight)
+            self.breakpoints, self.values = iso.X_thresholds_, iso.y_thresholds_
+
+        elif self.method == 'binning':
+            edges = np.unique(np.quantile(scores, np.linspace(0, 1, self.bins + 1)[1:-1]))
+            idx = np.searchsorted(edges, scores, side='right')
+            w = np.ones_like(y) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+            n = np.bincount(idx, weights=w, minlength=len(edges) + 1)
+            defaults = np.bincount(idx, weights=w * y, minlength=len(edges) + 1)
+            self.breakpoints = edges
+            self.values = np.clip(np.divide(defaults, n, out=np.zeros_like(n), where=n > 0),
+                                  PD_MIN, PD_MAX)
+
+        else:
+            z = logit(np.clip(scores, SCORE_EPS, 1 - SCORE_EPS)).reshape(-1, 1)
+            lr = LogisticRegression(C=1e6).fit(z, y, sample_weight=sample_weight)
+            self.coef = (float(lr.coef_[0, 0]), float(lr.intercept_[0]))
+
+        return self
+
+    def apply(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Calibrated PD per score.
+
+        Args:
+            scores (np.ndarray): Raw model PDs.
+
+        Returns:
+            np.ndarray: Calibrated PDs in [PD_MIN, PD_MAX].
+        """
+        return np.clip(self._map(np.asarray(scores, dtype=float)), PD_MIN, PD_MAX)
+
+    def _map(self, s: np.ndarray) -> np.ndarray:
+        if self.method == 'platt':
+            a, b = self.coef
+            return expit(a * logit(np.clip(s, SCORE_EPS, 1 - SCORE_EPS)) + b)
+
+        x, v = self.breakpoints, self.values
+        if self.method == 'binning':
+            return v[np.searchsorted(x, s, side='right')]
+
+        # isotonic: linear interpolation between breakpoints, clipped at the ends
+        if len(x) == 1:
+            return np.full(s.shape, v[0])
+        idx = np.clip(np.searchsorted(x, s, side='right'), 1, len(x) - 1)
+        x0, x1 = x[idx - 1], x[idx]
+        t = np.clip((s - x0) / (x1 - x0), 0.0, 1.0)
+        return v[idx - 1] + t * (v[idx] - v[idx - 1])
+
+    def to_dict(self) -> dict:
+        return {
+            'method'     : self.method,
+            'bins'       : self.bins,
+            'breakpoints': self.breakpoints.tolist(),
+            'values'     : self.values.tolist(),
+            'coef'       : list(self.coef),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'PDCalibrator':
+        calibrator = cls(d['method'], d['bins'])
+        calibrator.breakpoints = np.asarray(d['breakpoints'], dtype=float)
+        calibrator.values = np.asarray(d['values'], dtype=float)
+        calibrator.coef = tuple(d['coef'])
+        return calibrator
+
+    def save(self, model_dir: str) -> None:
+        """Store the calibrator next to the model artifact (calibration.json)."""
+        os.makedirs(model_dir, exist_ok=True)
+        with open(os.path.join(model_dir, 'calibration.json'), 'w') as f:
+            json.dump(self.to_dict(), f)
+
+
+def load_calibrator(model_dir: str) -> PDCalibrator | None:
+    """Calibrator saved with the model, or None if the artifact has none."""
+    path = os.path.join(model_dir, 'calibration.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return PDCalibrator.from_dict(json.load(f))
+
+
+def calibration_report(
+    y: np.ndarray,
+    raw: np.ndarray,
+    calibrated: np.ndarray,
+    bins: int = 10
+) -> pd.DataFrame:
+    """
+    Observed default rate vs. raw and calibrated PD per calibrated-PD decile.
+
+    Prints Brier score and log loss before and after calibration.
+
+    Args:
+        y          (np.ndarray): Observed defaults.
+        raw        (np.ndarray): Raw model PDs.
+        calibrated (np.ndarray): Calibrated PDs.
+        bins       (int)       : Number of quantile bins.
+
+    Returns:
+        pd.DataFrame: n, mean raw PD, mean calibrated PD and observed
+                      default rate per bin.
+    """
+    y = np.asarray(y, dtype=float)
+    clipped = np.clip(calibrated, SCORE_EPS, 1 - SCORE_EPS)
+    print(f"Brier score:  {brier_score_loss(y, raw):.4f} raw  →  {brier_score_loss(y, calibrated):.4f} calibrated")
+    print(f"Log loss:     {log_loss(y, raw):.4f} raw  →  {log_loss(y, clipped):.4f} calibrated")
+
+    bucket = pd.qcut(calibrated, q=bins, duplicates='drop')
+    return pd.DataFrame({'raw_pd': raw, 'calibrated_pd': calibrated, 'observed_dr': y}).groupby(
+        bucket, observed=True).agg(
+        n=('observed_dr', 'size'),
+        raw_pd=('raw_pd', 'mean'),
+        calibrated_pd=('calibrated_pd', 'mean'),
+        observed_dr=('observed_dr', 'mean'),
+    )
@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+from typing import Iterator
+
+from Credit_Model import amortization, outstanding_balance
+
+# ══════════════════════════════════════════════════════════════════
+# AMORTIZATION SCHEDULE ENGINE
+# Month-by-month cash flows for every loan, produced as
+# (loans × months) float32 blocks. Per-unit-principal factors are
+# computed once per month block from amortization() and
+# outstanding_balance() and broadcast against the principal vector,
+# so a 240-month × 1M-loan book is never materialized as one array.
+#
+# Default timing comes from a monthly hazard term structure h_t,
+# shared (months,) or per loan (loans, months); marginal-PD curves are
+# converted with hazard_from_marginal(). Without a curve, a flat hazard
+# implied by the 12-month PD is used:
+#   S(t) = Π_{k<=t} (1 − h_k),   marginal PD_t = S(t−1) · h_t
+# ══════════════════════════════════════════════════════════════════
+
+
+def monthly_hazard(pd_annual: np.ndarray) -> np.ndarray:
+    """
+    Constant monthly default hazard implied by a 12-month PD.
+
+    h = 1 - (1 - PD)^(1/12)
+
+    Args:
+        pd_annual (np.ndarray): 12-month PD per loan.
+
+    Returns:
+        np.ndarray: Monthly hazard per loan.
+    """
+    return 1 - (1 - np.clip(pd_annual, 0, 1)) ** (1 / 12)
+
+
+def hazard_from_marginal(marginal_pd: np.ndarray) -> np.ndarray:
+    """
+    Monthly hazard curve from a marginal (unconditional) PD curve.
+
+    h_t = m_t / S(t-1),  S(t-1) = 1 − Σ_{k<t} m_k
+
+    Args:
+        marginal_pd (np.ndarray): Probability of defaulting in month t,
+                                  shape (months,) or (loans, months).
+
+    Returns:
+        np.ndarray: Hazard curve of the same shape.
+    """
+    marginal_pd = np.asarray(marginal_pd, dtype=np.float64)
+    survival_prev = 1 - (np.cumsum(marginal_pd, axis=-1) - marginal_pd)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hazard = np.where(survival_prev > 0, marginal_pd / survival_prev, 1.0)
+    return np.clip(hazard, 0, 1)
+
+
+def _hazard_block(
+    flat: np.ndarray | None,
+    curve: np.ndarray | None,
+    loans: slice,
+    t: np.ndarray
+) -> np.ndarray:
+    """Hazard for one (loan chunk × month chunk) block, shape (loans, months)."""
+    if curve is None:
+        return np.broadcast_to(flat[loans, None], (len(flat[loans]), len(t)))
+    if curve.ndim == 2:
+        return curve[loans][:, t - 1]
+    return curve[None, t - 1]
+
+
+def balance_factors(annual_rate: float, months: int, t: np.ndarray) -> np.ndarray:
+    """Outstanding balance per unit of principal after t payments."""
+    return outstanding_balance(1.0, annual_rate, months, t)
+
+
+def iter_schedule(
+    principal: np.ndarray,
+    annual_rate: float,
+    months: int,
+    pd_annual: np.ndarray | None = None,
+    lgd: np.ndarray | None = None,
+    loan_chunk: int = 100_000,
+    month_chunk: int = 24,
+    hazard: np.ndarray | None = None
+) -> Iterator[dict]:
+    """
+    Yield the amortization schedule in (loan chunk × month chunk) blocks.
+
+    Each block holds float32 arrays of shape (loans, months) for:
+        payment, interest, principal, balance (after the payment).
+    When a hazard curve is given, or pd_annual (12-month PDs, converted
+    to a flat monthly hazard when there is no curve), the block also
+    contains:
+        survival       : probability of no default up to month t
+        marginal_pd    : probability of defaulting in month t
+        expected_loss  : marginal_pd × LGD × balance before the payment
+        expected_payment: survival × payment
+
+    Args:
+        principal   (np.ndarray)       : Original loan amounts.
+        annual_rate (float)            : Annual rate as percentage (e.g. 11.5040).
+        months      (int)              : Total number of monthly payments.
+        pd_annual   (np.ndarray | None): 12-month PD per loan (flat-hazard fallback).
+        lgd         (np.ndarray | None): LGD per loan (default 1).
+        loan_chunk  (int)              : Loans per block.
+        month_chunk (int)              : Months per block.
+        hazard      (np.ndarray | None): Monthly hazard term structure, shape
+                                         (months,) for the whole book or
+                                         (loans, months); see hazard_from_marginal().
+
+    Yields:
+        dict: 'loans' (slice), 'months' (1-based month numbers) and the arrays above.
+    """
+    principal = np.asarray(principal, dtype=np.float32)
+    payment_factor = np.float32(amortization(1.0, annual_rate, months) / months)
+    r = (annual_rate / 100) / 12
+
+    curve = None if hazard is None else np.asarray(hazard, dtype=np.float64)
+    if curve is not None and curve.shape[-1] < months:
+        raise ValueError(f"Hazard curve covers {curve.shape[-1]} months, need {months}")
+    flat = None
+    if curve is None and pd_annual is not None:
+        flat = monthly_hazard(np.asarray(pd_annual, dtype=np.float64))
+    with_default = curve is not None or flat is not None
+    lgd = None if lgd is None else np.asarray(lgd, dtype=np.float32)
+
+    for lo in range(0, len(principal), loan_chunk):
+        loans = slice(lo, min(lo + loan_chunk, len(principal)))
+        P = principal[loans, None]
+        survival_start = np.ones((P.shape[0], 1))   # S(t-1) at the start of the month block
+
+        for m0 in range(1, months + 1, month_chunk):
+            t = np.arange(m0, min(m0 + month_chunk, months + 1))
+            begin = balance_factors(annual_rate, months, t - 1)
+            end = balance_factors(annual_rate, months, t)
+
+            balance_begin = P * begin.astype(np.float32)
+            interest = P * (begin * r).astype(np.float32)
+            block = {
+                'loans'    : loans,
+                'months'   : t,
+                'payment'  : np.broadcast_to(P * payment_factor, (P.shape[0], len(t))),
+                'interest' : interest,
+                'principal': P * (begin - end).astype(np.float32),
+                'balance'  : P * end.astype(np.float32),
+            }
+
+            if with_default:
+                h = _hazard_block(flat, curve, loans, t)
+                survival = survival_start * np.cumprod(1 - h, axis=1)
+                survival_prev = np.concatenate([survival_start, survival[:, :-1]], axis=1)
+                marginal = (survival_prev * h).astype(np.float32)
+                survival_start = survival[:, -1:]
+                survival = survival.astype(np.float32)
+                loss_rate = 1.0 if lgd is None else lgd[loans, None]
+                block['survival'] = survival
+                block['marginal_pd'] = marginal
+                block['expected_loss'] = marginal * loss_rate * balance_begin
+                block['expected_payment'] = survival * block['payment']
+
+            yield block
+
+
+def monthly_totals(
+    principal: np.ndarray,
+    annual_rate: float,
+    months: int,
+    pd_annual: np.ndarray | None = None,
+    lgd: np.ndarray | None = None,
+    hazard: np.ndarray | None = None,
+    **kwargs
+) -> pd.DataFrame:
+    """
+    Portfolio cash flows per month, aggregated lazily block by block.
+
+    Composes iter_schedule(); memory is bounded by one block.
+
+    Args:
+        principal   (np.ndarray)       : Original loan amounts.
+        annual_rate (float)            : Annual rate as percentage.
+        months      (int)              : Total number of monthly payments.
+        pd_annual   (np.ndarray | None): 12-month PD per loan (flat-hazard fallback).
+        lgd         (np.ndarray | None): LGD per loan.
+        hazard      (np.ndarray | None): Monthly hazard curve, (months,) or (loans, months).
+        **kwargs                       : loan_chunk / month_chunk for iter_schedule().
+
+    Returns:
+        pd.DataFrame: One row per month with summed payment, interest,
+                      principal, balance and, with PDs or a hazard curve, expected_loss,
+                      expected_payment and expected surviving balance.
+    """
+    columns = ['payment', 'interest', 'principal', 'balance']
+    if pd_annual is not None or hazard is not None:
+        columns += ['expected_loss', 'expected_payment', 'expected_balance']
+
+    totals = np.zeros((months, len(columns)), dtype=np.float64)
+    for block in iter_schedule(principal, annual_rate, months, pd_annual, lgd,
+                               hazard=hazard, **kwargs):
+        rows = block['months'] - 1
+        for j, col in enumerate(columns):
+            if col == 'expected_balance':
+                values = block['survival'] * block['balance']
+            else:
+                values = block[col]
+            totals[rows, j] += values.sum(axis=0, dtype=np.float64)
+
+    return pd.DataFrame(totals, columns=columns,
+                        index=pd.RangeIndex(1, months + 1, name='month'))
+
+
+def loan_schedule(principal: float, annual_rate: float, months: int) -> pd.DataFrame:
+    """
+    Full amortization table for a single loan.
+
+    Args:
+        principal   (float): Loan amount.
+        annual_rate (float): Annual rate as percentage.
+        months      (int)  : Total number of monthly payments.
+
+    Returns:
+        pd.DataFrame: payment, interest, principal and balance per month.
+    """
+    block = next(iter_schedule(np.array([principal]), annual_rate, months, month_chunk=months))
+    return pd.DataFrame({col: block[col][0] for col in ['payment', 'interest', 'principal', 'balance']},
+                        index=pd.RangeIndex(1, months + 1, name='month'))
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.metrics import roc_auc_score
+
+from Credit_Model import feature_engineering, allocate_el_buffers, el_columns
+from scoring import feature_names, to_matrix, predict_pd
+
+# ══════════════════════════════════════════════════════════════════
+# CHAMPION / CHALLENGER SCORING
+# Scores a champion and any number of challenger models against the
+# same book in one pass per batch:
+#   1. feature_engineering() runs once per batch
+#   2. one float32 matrix holds the union of all model features;
+#      models with the same feature list share the same view
+#   3. all models score concurrently on a thread pool
+#   4. EL is evaluated per model into one reused set of buffers
+# Each batch yields a side-by-side PD / EL / AUC comparison.
+# ══════════════════════════════════════════════════════════════════
+
+
+class FoldEnsemble:
+    """
+    Average PD of the fold models from k_fold_cross_validation().
+
+    Exposes predict_proba() and feature_names_in_, so predict_pd() and
+    ChampionChallenger treat it like any other model.
+
+    Args:
+        models (list): Fitted fold models (cv_results['fold_models']).
+    """
+
+    def __init__(self, models: list):
+        self.models = models
+        self.feature_names_in_ = np.asarray(feature_names(models[0]))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        pd_ = np.mean([predict_pd(m, X, n_threads=1) for m in self.models], axis=0)
+        return np.column_stack([1 - pd_, pd_])
+
+
+class ChampionChallenger:
+    """
+    Side-by-side scoring of several PD models on a shared feature matrix.
+
+    Args:
+        models     (dict[str, Any])       : Name → fitted model (XGBClassifier,
+                                            LogisticRegression, FoldEnsemble, ...).
+        champion   (str)                  : Name of the reference model.
+        thresholds (float | dict)         : Classification cutoff, shared or per model.
+        haircut    (float)                : Foreclosure cost fraction for LGD.
+        n_threads  (int | None)           : Models scored concurrently
+                                            (default: one per model).
+        calibrators (dict | None)         : Name → PDCalibrator applied to that
+                                            model's scores.
+    """
+
+    def __init__(
+        self,
+        models: dict[str, Any],
+        champion: str,
+        thresholds: float | dict[str, float],
+        haircut: float = 0.30,
+        n_threads: int | None = None,
+        calibrators: dict[str, Any] | None = None
+    ):
+        if champion not in models:
+            raise ValueError(f"Champion '{champion}' is not among the models")
+        self.models = models
+        self.champion = champion
+        self.thresholds = (thresholds if isinstance(thresholds, dict)
+                           else dict.fromkeys(models, thresholds))
+        self.haircut = haircut
+        self.n_threads = n_threads or len(models)
+        self.calibrators = calibrators or {}
+
+        # Union of feature columns, champion order first
+        self.features = {name: feature_names(m) for name, m in models.items()}
+        self.columns = list(self.features[champion])
+        for cols in self.features.values():
+            self.columns += [c for c in cols if c not in self.columns]
+
+    def _views(self, matrix: np.ndarray) -> dict[str, np.ndarray]:
+        """Per-model column view of the shared matrix (one copy per distinct feature list)."""
+        position = {c: i for i, c in enumerate(self.columns)}
+        cache, views = {}, {}
+        for name, cols in self.features.items():
+            key = tuple(cols)
+            if key not in cache:
+                idx = [position[c] for c in cols]
+                cache[key] = (matrix if len(idx) == matrix.shape[1] and idx == sorted(idx)
+                              else np.ascontiguousarray(matrix[:, idx]))
+            views[name] = cache[key]
+        return views
+
+    def score_batch(self, raw: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, np.ndarray]]:
+        """
+        Engineer features once and score every model on them.
+
+        Args:
+            raw (pd.DataFrame): Cleaned HMEQ rows (load_data() layout).
+
+        Returns:
+            tuple: (engineered features, {model name: PD array}), with
+                   calibrators applied where configured.
+        """
+        features = feature_engineering(raw)
+        views = self._views(to_matrix(features, self.columns))
+        with ThreadPoolExecutor(max_workers=self.n_threads) as pool:
+            futures = {name: pool.submit(predict_pd, model, views[name])
+                       for name, model in self.models.items()}
+        pds = {name: f.result() for name, f in futures.items()}
+        for name, calibrator in self.calibrators.items():
+            pds[name] = calibrator.apply(pds[name])
+        return features, pds
+
+    def compare(
+        self,
+        features: pd.DataFrame,
+        pds: dict[str, np.ndarray],
+        target: str = 'BAD'
+    ) -> pd.DataFrame:
+        """
+        Side-by-side portfolio view of one scored batch.
+
+        Args:
+            features (pd.DataFrame)         : Output of score_batch() (needs MORTDUE, VALUE).
+            pds      (dict[str, np.ndarray]): PD per model from score_batch().
+            target   (str)                  : Label column; AUC and the approved
+                                              bad rate are reported when present.
+
+        Returns:
+            pd.DataFrame: One row per model (champion first) with mean and
+                          EAD-weighted PD, EL, EL_pct, approval rate,
+                          decision swaps vs. the champion and AUC.
+        """
+        ead = features['MORTDUE'].to_numpy(dtype=float)
+        value = features['VALUE'].to_numpy(dtype=float)
+        y = features[target].to_numpy() if target in features else None
+        buffers = allocate_el_buffers(len(ead))
+        total_ead = ead.sum()
+
+        champion_reject = pds[self.champion] >= self.thresholds[self.champion]
+        rows = {}
+        for name in [self.champion] + [n for n in self.models if n != self.champion]:
+            proba = pds[name]
+            cols = el_columns(proba, ead, value, self.thresholds[name], self.haircut, out=buffers)
+            approved = cols['model_prediction'] == 0
+            el = np.nansum(cols['EL_amount'])
+            row = {
+                'mean_pd'      : proba.mean(),
+                'weighted_pd'  : np.dot(proba, ead) / total_ead,
+                'EL'           : el,
+                'EL_pct'       : el / total_ead,
+                'approval_rate': approved.mean(),
+                'swaps'        : int(np.count_nonzero(~approved != champion_reject)),
+            }
+            if y is not None:
+                row['AUC'] = roc_auc_score(y, proba) if len(np.unique(y)) == 2 else np.nan
+                row['approved_bad_rate'] = y[approved].mean() if approved.any() else np.nan
+            rows[name] = row
+
+        table = pd.DataFrame.from_dict(rows, orient='index')
+        table.index.name = 'model'
+        return table
+
+    def run(
+        self,
+        batches: Iterable[pd.DataFrame],
+        target: str = 'BAD'
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a book: each batch is read, transformed and scored once.
+
+        Args:
+            batches (Iterable[pd.DataFrame]): Cleaned HMEQ chunks
+                                              (e.g. pd.read_csv(..., chunksize=n)).
+            target  (str)                   : Label column, if present.
+
+        Yields:
+            pd.DataFrame: compare() table per batch, with a batch column.
+        """
+        for i, raw in enumerate(batches):
+            features, pds = self.score_batch(raw)
+            yield self.compare(features, pds, target).assign(batch=i, n=len(features))
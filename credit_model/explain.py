@@ -0,0 +1,171 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from xgboost import DMatrix, XGBClassifier
+
+from Credit_Model import best_iteration
+from scoring import to_matrix, feature_names
+
+# ══════════════════════════════════════════════════════════════════
+# SHAP EXPLANATIONS AND REASON CODES
+# Tree SHAP values come from XGBoost's native pred_contribs, which is
+# the same exact algorithm as shap.TreeExplainer, computed in row
+# chunks on a thread pool. Values are persisted next to the scored
+# book and looked up by loan index for adverse-action reason codes.
+# ══════════════════════════════════════════════════════════════════
+
+
+def stratified_sample(
+    X: pd.DataFrame,
+    strata: pd.Series | np.ndarray,
+    n: int,
+    random_state: int = 42
+) -> pd.DataFrame:
+    """
+    Sample rows proportionally within each stratum.
+
+    Args:
+        X            (pd.DataFrame)            : Features to sample from.
+        strata       (pd.Series | np.ndarray)  : Stratum per row (e.g. BAD or a PD decile).
+        n            (int)                     : Target sample size.
+        random_state (int)                     : Reproducibility seed.
+
+    Returns:
+        pd.DataFrame: Sampled rows, original index preserved.
+    """
+    if n >= len(X):
+        return X
+    strata = pd.Series(np.asarray(strata), index=X.index)
+    frac = n / len(X)
+    idx = strata.groupby(strata).sample(frac=frac, random_state=random_state).index
+    return X.loc[idx]
+
+
+def shap_values(
+    model: XGBClassifier,
+    X: pd.DataFrame,
+    chunk_size: int = 5_000,
+    n_threads: int | None = None
+) -> tuple[np.ndarray, float]:
+    """
+    Tree SHAP values (log-odds scale) computed in parallel row chunks.
+
+    Args:
+        model      (XGBClassifier): Fitted XGBoost classifier.
+        X          (pd.DataFrame) : Features to explain.
+        chunk_size (int)          : Rows per chunk.
+        n_threads  (int | None)   : Chunks explained concurrently.
+
+    Returns:
+        tuple: (values of shape (n_rows, n_features) as float32, base value).
+    """
+    names = feature_names(model)
+    M = to_matrix(X, names)
+    booster = model.get_booster()
+    n_trees = best_iteration(model)
+
+    def explain(start: int) -> np.ndarray:
+        block = DMatrix(M[start:start + chunk_size], feature_names=names)
+        return booster.predict(block, pred_contribs=True,
+                               iteration_range=(0, n_trees))
+
+    with ThreadPoolExecutor(max_workers=n_threads or os.cpu_count()) as pool:
+        blocks = list(pool.map(explain, range(0, len(M), chunk_size)))
+
+    contribs = np.vstack(blocks)
+    # Last column is the bias term, identical for every row
+    return contribs[:, :-1].astype(np.float32), float(contribs[0, -1])
+
+
+def to_explanation(values: np.ndarray, base_value: float, X: pd.DataFrame):
+    """Wrap precomputed values as a shap.Explanation for shap's plots."""
+    import shap
+    return shap.Explanation(values=values,
+                            base_values=np.full(len(values), base_value),
+                            data=X.to_numpy(),
+                            feature_names=list(X.columns))
+
+
+class ExplanationStore:
+    """
+    SHAP values for a scored book, addressable by loan index.
+
+    Args:
+        values     (np.ndarray): SHAP values, one row per loan.
+        base_value (float)     : Model expected value (log-odds).
+        index      (np.ndarray): Loan identifiers, aligned with values.
+        features   (list[str]) : Feature names, aligned with columns.
+    """
+
+    def __init__(self, values: np.ndarray, base_value: float,
+                 index: np.ndarray, features: list[str]):
+        self.values = values
+        self.base_value = base_value
+        self.index = np.asarray(index)
+        self.features = np.asarray(features)
+        self._order = np.argsort(self.index, kind='stable')
+        self._sorted = self.index[self._order]
+
+    @classmethod
+    def from_model(cls, model: XGBClassifier, X: pd.DataFrame,
+                   sample_size: int | None = None,
+                   strata: pd.Series | None = None, **kwargs) -> 'ExplanationStore':
+        """
+        Explain a book (optionally a stratified sample of it).
+
+        Args:
+            model       (XGBClassifier)   : Fitted XGBoost classifier.
+            X           (pd.DataFrame)    : Book features; its index is the loan id.
+            sample_size (int | None)      : Explain only this many rows.
+            strata      (pd.Series | None): Strata for sampling (default: PD deciles).
+            **kwargs                      : Passed to shap_values().
+        """
+        if sample_size is not None and sample_size < len(X):
+            if strata is None:
+                proba = model.predict_proba(X)[:, 1]
+                strata = pd.qcut(proba, q=10, labels=False, duplicates='drop')
+            X = stratified_sample(X, strata, sample_size)
+        values, base_value = shap_values(model, X, **kwargs)
+        return cls(values, base_value, X.index.to_numpy(), list(X.columns))
+
+    def save(self, path: str) -> None:
+        """
+        Persist to a compressed .npz file.
+
+        Object indexes (e.g. string loan ids) are stored as fixed-width
+        unicode so load() works without pickle.
+        """
+        index = self.index.astype(str) if self.index.dtype == object else self.index
+        np.savez_compressed(path, values=self.values, base_value=self.base_value,
+                            index=index, features=self.features.astype(str))
+
+    @classmethod
+    def load(cls, path: str) -> 'ExplanationStore':
+        """Load a store written by save()."""
+        data = np.load(path, allow_pickle=False)
+        return cls(data['values'], float(data['base_value']),
+                   data['index'], list(data['features']))
+
+    def row(self, loan_id) -> np.ndarray:
+        """SHAP values for one loan (binary search over the index)."""
+        pos = np.searchsorted(self._sorted, loan_id)
+        if pos == len(self._sorted) or self._sorted[pos] != loan_id:
+            raise KeyError(loan_id)
+        return self.values[self._order[pos]]
+
+    def reason_codes(self, loan_id, k: int = 4) -> list[tuple[str, float]]:
+        """
+        Top features pushing this loan's PD up, for adverse-action notices.
+
+        Args:
+            loan_id : Loan index value.
+            k (int) : Number of reasons to return.
+
+        Returns:
+            list: (feature, SHAP contribution) pairs, largest first,
+                  only features with a positive contribution.
+        """
+        row = self.row(loan_id)
+        top = np.argsort(row)[::-1][:k]
+        return [(str(self.features[i]), float(row[i])) for i in top if row[i] > 0]
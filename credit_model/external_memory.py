@@ -0,0 +1,295 @@
+import os
+import numpy as np
+import pandas as pd
+import xgboost
+from typing import Callable, Iterable, Iterator
+from xgboost import XGBClassifier
+from sklearn.metrics import roc_auc_score
+
+from Credit_Model import feature_engineering, best_iteration, train_xgboost_dmatrix
+from scoring import predict_pd
+
+# ══════════════════════════════════════════════════════════════════
+# OUT-OF-CORE TRAINING
+# Trains the XGBoost PD model on loan histories that do not fit in
+# RAM. Cleaned chunks are streamed from disk (CSV or Parquet) through
+# an XGBoost DataIter, feature_engineering() runs per chunk, and the
+# quantized pages live in an external-memory QuantileDMatrix.
+#
+# Cross validation keeps k_fold_cross_validation() semantics through a
+# FOLD column: stratified fold ids are taken from the file when present,
+# otherwise dealt per chunk from a seed derived from (random_state,
+# chunk number), so every pass over the data sees the same assignment.
+# The in-memory 2x bootstrap becomes Poisson(2) row weights, drawn the
+# same way.
+# ══════════════════════════════════════════════════════════════════
+
+FOLD_COL = 'FOLD'
+DROP_COLS = ['HOME_EQUITY', 'TOTAL_DEBT']
+
+
+def read_chunks(paths: str | list[str], chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Cleaned data (load_data() layout) from CSV or Parquet files, chunk by chunk.
+
+    Parquet requires pyarrow.
+
+    Args:
+        paths     (str | list[str]): One or more .csv / .parquet files.
+        chunksize (int)            : Rows per chunk.
+
+    Yields:
+        pd.DataFrame: One chunk.
+    """
+    for path in [paths] if isinstance(paths, str) else paths:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def assign_folds(y: np.ndarray, n_splits: int, seed: int | list[int]) -> np.ndarray:
+    """
+    Stratified fold ids for one chunk.
+
+    Rows of each class are shuffled and dealt round-robin from a random
+    starting fold, so every fold gets the chunk's class ratio.
+
+    Args:
+        y        (np.ndarray)      : Labels of the chunk.
+        n_splits (int)             : Number of folds.
+        seed     (int | list[int]) : Seed for the shuffle.
+
+    Returns:
+        np.ndarray: Fold id (0 .. n_splits-1) per row.
+    """
+    rng = np.random.default_rng(seed)
+    folds = np.empty(len(y), dtype=np.int64)
+    for cls in np.unique(y):
+        idx = rng.permutation(np.flatnonzero(y == cls))
+        folds[idx] = (rng.integers(n_splits) + np.arange(len(idx))) % n_splits
+    return folds
+
+
+class ChunkIter(xgboost.DataIter):
+    """
+    XGBoost DataIter over engineered chunks, optionally restricted to folds.
+
+    Args:
+        chunk_source   (Callable)          : Returns a fresh iterable of cleaned
+                                             chunks (e.g. lambda: read_chunks(paths)).
+        target         (str)               : Label column.
+        folds          (Iterable | None)   : Fold ids to keep (None = all rows).
+        n_splits       (int)               : Folds used when FOLD is not in the data.
+        random_state   (int)               : Seed for fold ids and bootstrap weights.
+        bootstrap_rate (float | None)      : Poisson bootstrap rate (2.0 mirrors
+                                             bootstrap_weights()); None = unweighted.
+        drop_cols      (list[str])         : Intermediate columns excluded from features.
+        cache_prefix   (str | None)        : Page cache path for external memory.
+    """
+
+    def __init__(
+        self,
+        chunk_source: Callable[[], Iterable[pd.DataFrame]],
+        target: str = 'BAD',
+        folds: Iterable[int] | None = None,
+        n_splits: int = 5,
+        random_state: int = 29,
+        bootstrap_rate: float | None = 2.0,
+        drop_cols: list[str] = DROP_COLS,
+        cache_prefix: str | None = None
+    ):
+        self.chunk_source = chunk_source
+        self.target = target
+        self.folds = None if folds is None else np.asarray(list(folds))
+        self.n_splits = n_splits
+        self.random_state = random_state
+        self.bootstrap_rate = bootstrap_rate
+        self.drop_cols = drop_cols
+        self.columns = None
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def batches(self) -> Iterator[tuple[pd.DataFrame, np.ndarray, np.ndarray | None]]:
+        """
+        (X, y, weight) per non-empty chunk after fold filtering.
+
+        Feature columns are fixed by the first chunk; later chunks are
+        aligned to them (missing one-hot columns become 0).
+        """
+        for chunk_no, raw in enumerate(self.chunk_source()):
+            df = feature_engineering(raw)
+            y = df[self.target].to_numpy()
+            fold = (df[FOLD_COL].to_numpy() if FOLD_COL in df
+                    else assign_folds(y, self.n_splits, [self.random_state, chunk_no]))
+            weight = None
+            if self.bootstrap_rate is not None:
+                rng = np.random.default_rng([self.random_state, chunk_no, 1])
+                weight = rng.poisson(self.bootstrap_rate, size=len(df)).astype(np.float32)
+
+            keep = np.ones(len(df), dtype=bool) if self.folds is None else np.isin(fold, self.folds)
+            if not keep.any():
+                continue
+
+            X = df.drop(columns=[self.target] + self.drop_cols + [FOLD_COL], errors='ignore')
+            if self.columns is None:
+                self.columns = list(X.columns)
+            X = X.reindex(columns=self.columns, fill_value=0)
+            yield X[keep], y[keep], None if weight is None else weight[keep]
+
+    def reset(self) -> None:
+        self._batches = None
+
+    def next(self, input_data: Callable) -> bool:
+        if self._batches is None:
+            self._batches = self.batches()
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        X, y, weight = batch
+        input_data(data=X, label=y, weight=weight)
+        return True
+
+
+def quantile_dmatrix(
+    it: ChunkIter,
+    ref: xgboost.DMatrix | None = None,
+    max_bin: int = 256,
+    in_memory: bool = False
+) -> xgboost.DMatrix:
+    """
+    Quantized training matrix built by streaming the iterator.
+
+    Args:
+        it        (ChunkIter)           : Data iterator.
+        ref       (DMatrix | None)      : Training matrix whose bin edges to reuse
+                                          (for evaluation sets).
+        max_bin   (int)                 : Histogram bins per feature.
+        in_memory (bool)                : Keep the quantized pages in RAM
+                                          (QuantileDMatrix) instead of on disk.
+
+    Returns:
+        xgboost.DMatrix: ExtMemQuantileDMatrix or QuantileDMatrix.
+    """
+    if in_memory:
+        return xgboost.QuantileDMatrix(it, max_bin=max_bin, ref=ref)
+    return xgboost.ExtMemQuantileDMatrix(it, max_bin=max_bin, ref=ref)
+
+
+def train_xgboost_external(
+    train_iter: ChunkIter,
+    val_iter: ChunkIter,
+    random_state: int,
+    early_stopping_rounds: int | None = 50,
+    params: dict | None = None,
+    max_bin: int = 256,
+    in_memory: bool = False
+) -> XGBClassifier:
+    """
+    Out-of-core counterpart of train_xgboost().
+
+    Streams both iterators into quantized matrices and fits them with
+    train_xgboost_dmatrix() (same hyperparameters and early stopping).
+
+    Args:
+        train_iter            (ChunkIter)  : Training rows.
+        val_iter              (ChunkIter)  : Validation rows.
+        random_state          (int)        : Random state for reproducibility.
+        early_stopping_rounds (int | None) : Rounds without improvement before stopping.
+        params                (dict | None): Overrides for XGB_PARAMS.
+        max_bin               (int)        : Histogram bins per feature.
+        in_memory             (bool)       : Quantized pages in RAM instead of on disk.
+
+    Returns:
+        XGBClassifier: Fitted classifier.
+    """
+    dtrain = quantile_dmatrix(train_iter, max_bin=max_bin, in_memory=in_memory)
+    dval = quantile_dmatrix(val_iter, ref=dtrain, max_bin=max_bin, in_memory=in_memory)
+    return train_xgboost_dmatrix(dtrain, dval, random_state, early_stopping_rounds, params)
+
+
+def k_fold_cross_validation_external(
+    chunk_source: Callable[[], Iterable[pd.DataFrame]],
+    n_splits: int = 5,
+    random_state: int = 29,
+    params: dict | None = None,
+    target: str = 'BAD',
+    bootstrap_rate: float | None = 2.0,
+    cache_dir: str = 'xgb_cache',
+    in_memory: bool = False,
+    **kwargs
+) -> tuple[dict, XGBClassifier]:
+    """
+    k_fold_cross_validation() over a chunked book.
+
+    Fold k validates on the rows with FOLD == k and trains on the rest.
+    Only the validation fold's labels and PDs are held in memory.
+
+    Args:
+        chunk_source   (Callable)    : Returns a fresh iterable of cleaned chunks.
+        n_splits       (int)         : Number of folds.
+        random_state   (int)         : Reproducibility seed.
+        params         (dict | None) : Optional XGBoost overrides.
+        target         (str)         : Label column.
+        bootstrap_rate (float | None): Poisson bootstrap rate (None = unweighted).
+        cache_dir      (str)         : Directory for external-memory page caches.
+        in_memory      (bool)        : Quantized pages in RAM instead of on disk.
+        **kwargs                     : max_bin / early_stopping_rounds for
+                                       train_xgboost_external().
+
+    Returns:
+        tuple: (results dict with the keys of k_fold_cross_validation(),
+                last fold model).
+    """
+    if not in_memory:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache(name: str) -> str | None:
+        return None if in_memory else os.path.join(cache_dir, name)
+
+    common = dict(target=target, n_splits=n_splits, random_state=random_state,
+                  bootstrap_rate=bootstrap_rate)
+    fold_aucs, fold_probas, fold_models = [], [], []
+
+    for fold in range(n_splits):
+        train_iter = ChunkIter(chunk_source, folds=[f for f in range(n_splits) if f != fold],
+                               cache_prefix=cache(f'fold{fold}_train'), **common)
+        val_iter = ChunkIter(chunk_source, folds=[fold],
+                             cache_prefix=cache(f'fold{fold}_val'), **common)
+        model = train_xgboost_external(train_iter, val_iter, random_state, params=params,
+                                       in_memory=in_memory, **kwargs)
+
+        ys, probas, weights = [], [], []
+        for X, y, w in val_iter.batches():
+            ys.append(y)
+            probas.append(predict_pd(model, X))
+            weights.append(w)
+        y_val = np.concatenate(ys)
+        y_val_proba = np.concatenate(probas)
+        w_val = None if bootstrap_rate is None else np.concatenate(weights)
+
+        auc = roc_auc_score(y_val, y_val_proba, sample_weight=w_val)
+        fold_aucs.append(auc)
+        fold_probas.append((pd.Series(y_val, name=target), y_val_proba, w_val))
+        fold_models.append(model)
+
+        print(f"  Fold {fold + 1}/{n_splits} — AUC: {auc:.4f}"
+              f"  (best iteration: {best_iteration(model)})")
+
+    mean_auc = np.mean(fold_aucs)
+    std_auc = np.std(fold_aucs)
+    print(f"\n  CV Mean AUC: {mean_auc:.4f} ± {std_auc:.4f}")
+
+    return {
+        'fold_aucs': fold_aucs,
+        'mean_auc': mean_auc,
+        'std_auc': std_auc,
+        'fold_probas': fold_probas,
+        'fold_models': fold_models
+    }, model
+
+
+if __name__ == '__main__':
+    results, model = k_fold_cross_validation_external(lambda: read_chunks('hmeq_cleaned.csv', 1_000))
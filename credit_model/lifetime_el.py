@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+from Credit_Model import lgd_hipotecario
+from cashflows import monthly_hazard, balance_factors, _hazard_block
+
+# ══════════════════════════════════════════════════════════════════
+# LIFETIME EXPECTED LOSS (IFRS 9 / CECL)
+# ECL = Σ_t marginal PD_t × LGD_t × EAD_t × DF_t
+#   marginal PD_t : S(t-1) × h_t, from a hazard curve when given,
+#                   otherwise a flat monthly hazard from the 12m PD
+#   EAD_t         : MORTDUE amortized with outstanding_balance()
+#   LGD_t         : lgd_hipotecario(EAD_t, VALUE) — LGD falls as the
+#                   balance amortizes against the same collateral
+#   DF_t          : (1 + r)^-t at the effective monthly rate
+# Evaluated as (loans × months) broadcasts over chunks of loans; the
+# running sum yields the 12m and lifetime EL from the same pass.
+# ══════════════════════════════════════════════════════════════════
+
+
+def _expected_loss_paths(
+    ead: np.ndarray,
+    property_value: np.ndarray,
+    pd_annual: np.ndarray | None,
+    annual_rate: float,
+    months: int,
+    horizons: list[int],
+    hazard: np.ndarray | None = None,
+    haircut: float = 0.30,
+    loan_chunk: int = 50_000
+) -> np.ndarray:
+    """Discounted EL per loan at each horizon, shape (loans, len(horizons)), in one pass."""
+    ead = np.asarray(ead, dtype=np.float64)
+    property_value = np.asarray(property_value, dtype=np.float64)
+    curve = None if hazard is None else np.asarray(hazard, dtype=np.float64)
+    flat = None
+    if curve is None:
+        if pd_annual is None:
+            raise ValueError("Need pd_annual or a hazard curve")
+        flat = monthly_hazard(np.asarray(pd_annual, dtype=np.float64))
+
+    cols = [months if h is None else min(h, months) for h in horizons]
+    T = max(cols)
+    if curve is not None and curve.shape[-1] < T:
+        raise ValueError(f"Hazard curve covers {curve.shape[-1]} months, need {T}")
+    t = np.arange(1, T + 1)
+    r = (annual_rate / 100) / 12
+    discount = (1 + r) ** -t
+    ead_factor = balance_factors(annual_rate, months, t - 1)   # balance when default occurs
+
+    out = np.empty((len(ead), len(cols)))
+    for lo in range(0, len(ead), loan_chunk):
+        sl = slice(lo, min(lo + loan_chunk, len(ead)))
+        h = _hazard_block(flat, curve, sl, t)
+        survival = np.cumprod(1 - h, axis=1)
+        survival_prev = np.concatenate([np.ones((h.shape[0], 1)), survival[:, :-1]], axis=1)
+        ead_t = ead[sl, None] * ead_factor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lgd_t = np.nan_to_num(lgd_hipotecario(ead_t, property_value[sl, None], haircut))
+        cum = np.cumsum(survival_prev * h * lgd_t * ead_t * discount, axis=1)
+        out[sl] = cum[:, np.asarray(cols) - 1]
+    return out
+
+
+def expected_loss_horizon(
+    ead: np.ndarray,
+    property_value: np.ndarray,
+    pd_annual: np.ndarray | None,
+    annual_rate: float,
+    months: int,
+    horizon: int | None = None,
+    haircut: float = 0.30,
+    loan_chunk: int = 50_000,
+    hazard: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Discounted expected loss per loan over the first `horizon` months.
+
+    Args:
+        ead            (np.ndarray)       : Current outstanding balance (MORTDUE).
+        property_value (np.ndarray)       : Appraised property value (VALUE).
+        pd_annual      (np.ndarray | None): 12-month PD per loan (flat-hazard fallback).
+        annual_rate    (float)            : Annual rate as percentage; also the discount rate.
+        months         (int)              : Remaining term in months.
+        horizon        (int | None)       : Months to accumulate (None = lifetime).
+        haircut        (float)            : Foreclosure cost fraction.
+        loan_chunk     (int)              : Loans evaluated per broadcast.
+        hazard         (np.ndarray | None): Monthly hazard curve, (months,) or (loans, months);
+                                            see cashflows.hazard_from_marginal().
+
+    Returns:
+        np.ndarray: Expected loss amount per loan.
+    """
+    return _expected_loss_paths(ead, property_value, pd_annual, annual_rate, months,
+                                [horizon], hazard=hazard, haircut=haircut,
+                                loan_chunk=loan_chunk)[:, 0]
+
+
+def allocate_stage(
+    pd_current: np.ndarray,
+    pd_origination: np.ndarray | None = None,
+    delinq: np.ndarray | None = None,
+    defaulted: np.ndarray | None = None,
+    sicr_ratio: float = 2.0,
+    sicr_pd: float = 0.20
+) -> np.ndarray:
+    """
+    IFRS 9 stage per loan.
+
+        Stage 3: credit-impaired (defaulted flag set)
+        Stage 2: significant increase in credit risk — PD at least
+                 sicr_ratio × origination PD, PD above sicr_pd, or
+                 any delinquent credit line (30 dpd backstop proxy)
+        Stage 1: everything else
+
+    Args:
+        pd_current     (np.ndarray)       : Current 12-month PD.
+        pd_origination (np.ndarray | None): PD at origination (relative test skipped if None).
+        delinq         (np.ndarray | None): Delinquent credit lines (DELINQ).
+        defaulted      (np.ndarray | None): Default indicator.
+        sicr_ratio     (float)            : Relative PD increase triggering stage 2.
+        sicr_pd        (float)            : Absolute PD triggering stage 2.
+
+    Returns:
+        np.ndarray: Stage (1, 2 or 3) per loan.
+    """
+    pd_current = np.asarray(pd_current)
+    sicr = pd_current >= sicr_pd
+    if pd_origination is not None:
+        sicr |= pd_current >= sicr_ratio * np.asarray(pd_origination)
+    if delinq is not None:
+        sicr |= np.asarray(delinq) > 0
+
+    stage = np.where(sicr, 2, 1)
+    if defaulted is not None:
+        stage = np.where(np.asarray(defaulted) == 1, 3, stage)
+    return stage
+
+
+def compute_ecl(
+    data_test: pd.DataFrame,
+    annual_rate: float,
+    months: int,
+    haircut: float = 0.30,
+    pd_origination: np.ndarray | None = None,
+    defaulted_col: str | None = None,
+    hazard: np.ndarray | None = None,
+    **kwargs
+) -> pd.DataFrame:
+    """
+    12-month and lifetime EL, stage and ECL allowance for each loan.
+
+    Composes the expected_loss_horizon() pass (12m and lifetime EL read
+    off one running sum) and allocate_stage().
+    ECL = 12m EL (stage 1), lifetime EL (stage 2), LGD × EAD (stage 3).
+
+    Args:
+        data_test      (pd.DataFrame)     : Book with default_proba, MORTDUE, VALUE, DELINQ.
+        annual_rate    (float)            : Annual rate as percentage.
+        months         (int)              : Remaining term in months.
+        haircut        (float)            : Foreclosure cost fraction.
+        pd_origination (np.ndarray | None): Origination PDs for the relative SICR test.
+        defaulted_col  (str | None)       : Column flagging credit-impaired loans.
+        hazard         (np.ndarray | None): Monthly hazard curve, (months,) or (loans, months);
+                                            flat hazard from default_proba when None.
+        **kwargs                          : loan_chunk for expected_loss_horizon(),
+                                            sicr_ratio / sicr_pd for allocate_stage().
+
+    Returns:
+        pd.DataFrame: EL_12m, EL_lifetime, stage and ECL, indexed like data_test.
+    """
+    loan_chunk = kwargs.pop('loan_chunk', 50_000)
+    ead = data_test['MORTDUE'].to_numpy(dtype=float)
+    value = data_test['VALUE'].to_numpy(dtype=float)
+    pd_12m = data_test['default_proba'].to_numpy(dtype=float)
+
+    el_12m, el_life = _expected_loss_paths(
+        ead, value, pd_12m, annual_rate, months, [12, None],
+        hazard=hazard, haircut=haircut, loan_chunk=loan_chunk
+    ).T
+    stage = allocate_stage(
+        pd_12m,
+        pd_origination=pd_origination,
+        delinq=data_test['DELINQ'].to_numpy() if 'DELINQ' in data_test else None,
+        defaulted=data_test[defaulted_col].to_numpy() if defaulted_col else None,
+        **kwargs
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        impaired = np.nan_to_num(lgd_hipotecario(ead, value, haircut)) * ead
+
+    return pd.DataFrame({
+        'EL_12m'     : el_12m,
+        'EL_lifetime': el_life,
+        'stage'      : stage,
+        'ECL'        : np.select([stage == 1, stage == 2], [el_12m, el_life], impaired),
+    }, index=data_test.index)
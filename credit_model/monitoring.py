@@ -0,0 +1,210 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# ══════════════════════════════════════════════════════════════════
+# POPULATION STABILITY AND DRIFT MONITORING
+# At training time each feature is binned on its training quantiles
+# and the reference bin shares are stored with the model. Scoring
+# batches only add to per-bin counters (O(bins) memory per feature),
+# from which PSI/CSI and PD calibration drift are computed at any
+# point.
+#   PSI = Σ (actual% − expected%) × ln(actual% / expected%)
+#   < 0.10 stable · 0.10–0.25 moderate shift · > 0.25 significant shift
+# ══════════════════════════════════════════════════════════════════
+
+PSI_EPS = 1e-4
+# Bin i holds edges[i-1] < x <= edges[i] (as in scorecard.py), so a
+# collapsed one-hot edge [0.0] still separates 0 from 1. References
+# written before this convention was recorded used side='right'.
+BIN_SIDE = 'left'
+
+
+def _bin_index(values: np.ndarray, inner_edges: np.ndarray, side: str = BIN_SIDE) -> np.ndarray:
+    """Bin per value; NaN goes to an extra last bin."""
+    values = np.asarray(values, dtype=float)
+    idx = np.searchsorted(inner_edges, values, side=side)
+    return np.where(np.isnan(values), len(inner_edges) + 1, idx)
+
+
+def _inner_edges(values: np.ndarray, bins: int) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+
+
+def _shares(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    return counts / total if total else counts
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two sets of bin shares."""
+    e = np.maximum(expected, PSI_EPS)
+    a = np.maximum(actual, PSI_EPS)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def psi_status(value: float) -> str:
+    """Conventional PSI reading."""
+    if value < 0.10:
+        return 'stable'
+    if value < 0.25:
+        return 'moderate'
+    return 'significant'
+
+
+def build_reference(
+    X_train: pd.DataFrame,
+    pd_scores: np.ndarray,
+    y: np.ndarray | None = None,
+    bins: int = 10
+) -> dict:
+    """
+    Binned reference distributions captured at training time.
+
+    Args:
+        X_train   (pd.DataFrame)     : Training features (one CSI per column).
+        pd_scores (np.ndarray)       : Reference PDs (e.g. validation-set scores).
+        y         (np.ndarray | None): Labels for pd_scores, for calibration.
+        bins      (int)              : Quantile bins per feature.
+
+    Returns:
+        dict: JSON-serializable reference with edges and bin shares.
+    """
+    features = {}
+    for col in X_train.columns:
+        values = X_train[col].to_numpy(dtype=float)
+        edges = _inner_edges(values, bins)
+        counts = np.bincount(_bin_index(values, edges), minlength=len(edges) + 2)
+        features[col] = {'edges': edges.tolist(), 'shares': _shares(counts).tolist()}
+
+    pd_scores = np.asarray(pd_scores, dtype=float)
+    pd_edges = _inner_edges(pd_scores, bins)
+    idx = _bin_index(pd_scores, pd_edges)
+    n_bins = len(pd_edges) + 2
+    counts = np.bincount(idx, minlength=n_bins)
+    score = {'edges': pd_edges.tolist(), 'shares': _shares(counts).tolist()}
+    if y is not None:
+        defaults = np.bincount(idx, weights=np.asarray(y, dtype=float), minlength=n_bins)
+        score['default_rate'] = np.divide(defaults, counts, out=np.zeros(n_bins),
+                                          where=counts > 0).tolist()
+
+    return {'features': features, 'score': score, 'side': BIN_SIDE}
+
+
+def save_reference(reference: dict, model_dir: str) -> None:
+    """Store the reference next to the model artifact (reference.json)."""
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, 'reference.json'), 'w') as f:
+        json.dump(reference, f)
+
+
+def load_reference(model_dir: str) -> dict:
+    """Load a reference written by save_reference()."""
+    with open(os.path.join(model_dir, 'reference.json')) as f:
+        return json.load(f)
+
+
+class DriftMonitor:
+    """
+    Incremental drift statistics against a stored reference.
+
+    Args:
+        reference (dict): Output of build_reference() / load_reference().
+    """
+
+    def __init__(self, reference: dict):
+        self.reference = reference
+        self._side = reference.get('side', 'right')
+        self._edges = {col: np.asarray(ref['edges'])
+                       for col, ref in reference['features'].items()}
+        self.counts = {col: np.zeros(len(e) + 2) for col, e in self._edges.items()}
+
+        self._pd_edges = np.asarray(reference['score']['edges'])
+        n_bins = len(self._pd_edges) + 2
+        self.pd_counts = np.zeros(n_bins)
+        self.pd_sum = np.zeros(n_bins)
+        self.labelled = np.zeros(n_bins)
+        self.defaults = np.zeros(n_bins)
+
+    def update(
+        self,
+        X: pd.DataFrame,
+        pd_scores: np.ndarray | None = None,
+        y: np.ndarray | None = None
+    ) -> None:
+        """
+        Add one scoring batch.
+
+        Args:
+            X         (pd.DataFrame)     : Batch features (reference columns are used).
+            pd_scores (np.ndarray | None): Batch PDs.
+            y         (np.ndarray | None): Observed defaults, once known.
+        """
+        for col, edges in self._edges.items():
+            if col in X:
+                idx = _bin_index(X[col].to_numpy(dtype=float), edges, self._side)
+                self.counts[col] += np.bincount(idx, minlength=len(self.counts[col]))
+
+        if pd_scores is None:
+            return
+        pd_scores = np.asarray(pd_scores, dtype=float)
+        n_bins = len(self.pd_counts)
+        idx = _bin_index(pd_scores, self._pd_edges, self._side)
+        self.pd_counts += np.bincount(idx, minlength=n_bins)
+        self.pd_sum += np.bincount(idx, weights=pd_scores, minlength=n_bins)
+        if y is not None:
+            y = np.asarray(y, dtype=float)
+            self.labelled += np.bincount(idx, minlength=n_bins)
+            self.defaults += np.bincount(idx, weights=y, minlength=n_bins)
+
+    def feature_report(self) -> pd.DataFrame:
+        """CSI per feature and PSI of the PD score, with their status."""
+        rows = {
+            col: psi(np.asarray(self.reference['features'][col]['shares']), _shares(counts))
+            for col, counts in self.counts.items() if counts.sum() > 0
+        }
+        if self.pd_counts.sum() > 0:
+            rows['PD (score)'] = psi(np.asarray(self.reference['score']['shares']),
+                                     _shares(self.pd_counts))
+        report = pd.Series(rows, name='PSI').to_frame()
+        report['status'] = report['PSI'].map(psi_status)
+        return report.sort_values('PSI', ascending=False)
+
+    def calibration_report(self) -> pd.DataFrame:
+        """
+        Predicted vs. observed default rate per PD bin.
+
+        Returns:
+            pd.DataFrame: n, mean predicted PD, observed default rate of the
+                          labelled rows and the reference default rate.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table = pd.DataFrame({
+                'n'           : self.pd_counts.astype(int),
+                'predicted_pd': self.pd_sum / self.pd_counts,
+                'observed_dr' : self.defaults / self.labelled,
+            })
+        if 'default_rate' in self.reference['score']:
+            table['reference_dr'] = self.reference['score']['default_rate']
+        return table[table['n'] > 0]
+
+
+def drift_summary(monitor: DriftMonitor, top: int = 10) -> None:
+    """
+    Print the largest feature shifts and PD calibration drift.
+
+    Args:
+        monitor (DriftMonitor): Monitor with at least one batch.
+        top     (int)         : Number of features to show.
+    """
+    print(monitor.feature_report().head(top))
+    calibration = monitor.calibration_report()
+    labelled = monitor.labelled.sum()
+    if labelled:
+        predicted = monitor.pd_sum[monitor.labelled > 0].sum() / monitor.pd_counts[monitor.labelled > 0].sum()
+        observed = monitor.defaults.sum() / labelled
+        print(f"\nPredicted PD vs. observed default rate: {predicted:.2%} vs. {observed:.2%}")
+    print(calibration)
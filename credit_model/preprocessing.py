@@ -0,0 +1,139 @@
+import joblib
+import pandas as pd
+from typing import Iterator
+from sklearn.impute import KNNImputer
+from sklearn.preprocessing import StandardScaler
+
+from Credit_Model import feature_engineering
+
+# ══════════════════════════════════════════════════════════════════
+# RAW DATA PREPROCESSING
+# Python version of Data_Cleaning.ipynb for raw hmeq.csv-shaped data:
+#   1. Drop rows without MORTDUE (it is the EAD)
+#   2. JOB: fill missing with 'Other', one-hot encode
+#   3. DEROG, DELINQ, NINQ: median imputation
+#   4. Remaining numeric columns: KNN imputation (k=5, distance
+#      weights) on standardized values
+#   5. DEROG rounded back to an integer count
+# Parameters are fitted once, persisted with joblib, and applied to
+# new files chunk by chunk.
+#
+# Unlike the notebook, BAD is not used as a KNN feature: it is not
+# known when a new application is scored.
+# ══════════════════════════════════════════════════════════════════
+
+JOB_CATEGORIES = ['Mgr', 'Office', 'Other', 'ProfExe', 'Sales', 'Self']
+MEDIAN_COLS = ['DEROG', 'DELINQ', 'NINQ']
+NUMERIC_COLS = ['LOAN', 'MORTDUE', 'VALUE', 'YOJ', 'DEROG', 'DELINQ',
+                'CLAGE', 'NINQ', 'CLNO', 'DEBTINC']
+
+
+class HMEQPreprocessor:
+    """
+    Fit-once, apply-many cleaning stage for raw HMEQ data.
+
+    Output columns match hmeq_cleaned.csv: BAD (when present), the
+    numeric columns and one JOB_<category> flag per category. Output
+    rows keep the input index; rows dropped for a missing MORTDUE are
+    reported and kept in dropped_.
+
+    Args:
+        n_neighbors (int): Neighbours for the KNN imputer.
+    """
+
+    def __init__(self, n_neighbors: int = 5):
+        self.n_neighbors = n_neighbors
+        self.medians = {}
+        self.scaler = StandardScaler()
+        self.imputer = KNNImputer(n_neighbors=n_neighbors, weights='distance')
+        self.dropped_ = pd.Index([])
+
+    @staticmethod
+    def _encode(raw: pd.DataFrame) -> pd.DataFrame:
+        df = raw.dropna(subset=['MORTDUE'])
+        job = df['JOB'].fillna('Other')
+        jobs = pd.DataFrame({f'JOB_{c}': (job == c).to_numpy() for c in JOB_CATEGORIES},
+                            index=df.index)
+        return pd.concat([df.drop(columns='JOB'), jobs], axis=1)
+
+    def fit(self, raw: pd.DataFrame) -> 'HMEQPreprocessor':
+        """
+        Learn medians, scaling and the KNN reference set from raw data.
+
+        Args:
+            raw (pd.DataFrame): Raw hmeq.csv-shaped training data.
+
+        Returns:
+            HMEQPreprocessor: self.
+        """
+        df = self._encode(raw)
+        self.medians = {col: float(df[col].median()) for col in MEDIAN_COLS}
+        X = df[NUMERIC_COLS].fillna(self.medians).to_numpy(dtype=float)
+        self.imputer.fit(self.scaler.fit_transform(X))
+        return self
+
+    def transform(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean raw rows with the fitted parameters.
+
+        Args:
+            raw (pd.DataFrame): Raw hmeq.csv-shaped data (BAD optional).
+
+        Returns:
+            pd.DataFrame: Cleaned rows in hmeq_cleaned.csv layout, indexed
+                          like raw. Labels of rows without MORTDUE (no
+                          EAD, cannot be scored) are in self.dropped_.
+        """
+        df = self._encode(raw)
+        self.dropped_ = raw.index.difference(df.index, sort=False)
+        if len(self.dropped_):
+            print(f"  Dropped {len(self.dropped_)} rows without MORTDUE: "
+                  f"{list(self.dropped_[:10])}{' ...' if len(self.dropped_) > 10 else ''}")
+        X = df[NUMERIC_COLS].fillna(self.medians).to_numpy(dtype=float)
+        X = self.scaler.inverse_transform(self.imputer.transform(self.scaler.transform(X)))
+
+        out = pd.DataFrame(X, columns=NUMERIC_COLS, index=df.index)
+        out['DEROG'] = out['DEROG'].round().astype(int)
+        jobs = df[[f'JOB_{c}' for c in JOB_CATEGORIES]]
+        parts = [df[['BAD']].astype(float)] if 'BAD' in df else []
+        return pd.concat(parts + [out, jobs], axis=1)
+
+    def save(self, path: str = 'preprocessor.joblib') -> None:
+        """Persist the fitted parameters."""
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str = 'preprocessor.joblib') -> 'HMEQPreprocessor':
+        """Load a preprocessor written by save()."""
+        return joblib.load(path)
+
+
+def stream_features(
+    filename: str,
+    preprocessor: HMEQPreprocessor,
+    chunksize: int = 50_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Raw CSV → cleaned → engineered features, one chunk at a time.
+
+    Composes HMEQPreprocessor.transform() and feature_engineering().
+
+    Args:
+        filename     (str)             : Raw hmeq.csv-shaped file.
+        preprocessor (HMEQPreprocessor): Fitted preprocessor.
+        chunksize    (int)             : Rows read per chunk.
+
+    Yields:
+        pd.DataFrame: Model-ready chunk (same columns as
+                      feature_engineering(load_data('hmeq_cleaned.csv'))),
+                      indexed by row position in the file.
+    """
+    for raw in pd.read_csv(filename, chunksize=chunksize):
+        yield feature_engineering(preprocessor.transform(raw))
+
+
+if __name__ == '__main__':
+    preprocessor = HMEQPreprocessor().fit(pd.read_csv('hmeq.csv'))
+    preprocessor.save()
+    n = sum(len(chunk) for chunk in stream_features('hmeq.csv', preprocessor))
+    print(f"Fitted preprocessor on hmeq.csv; {n} rows ready for scoring")
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import resource
+import functools
+import threading
+import pandas as pd
+from typing import Any, Callable
+from contextlib import contextmanager
+
+# ══════════════════════════════════════════════════════════════════
+# STAGE-LEVEL PROFILING
+# Opt-in instrumentation for the Credit_Model layers. Each stage
+# records wall time, CPU time, RSS growth and rows processed.
+# Disabled by default: a decorated call then costs one flag check.
+# Enable with enable_profiling() or CREDIT_MODEL_PROFILE=1.
+# ══════════════════════════════════════════════════════════════════
+
+_STATE = {
+    'enabled': os.environ.get('CREDIT_MODEL_PROFILE') == '1',
+    'records': [],
+    'origin' : time.perf_counter(),
+}
+
+
+def enable_profiling(enabled: bool = True) -> None:
+    """Turn stage recording on or off and clear previous records."""
+    _STATE['enabled'] = enabled
+    _STATE['records'] = []
+    _STATE['origin'] = time.perf_counter()
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, else peak RSS)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rows(obj: Any) -> int | None:
+    """Row count of a DataFrame / array-like argument, if it has one."""
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+@contextmanager
+def stage(name: str, layer: str = '', rows: int | None = None):
+    """
+    Record one stage while the block runs.
+
+    Yields a dict whose 'rows' entry can be filled in by the block when
+    the row count is only known afterwards.
+
+    Args:
+        name  (str)       : Stage name (usually the function name).
+        layer (str)       : Pipeline layer label, e.g. 'LAYER 7'.
+        rows  (int | None): Rows processed by the stage.
+    """
+    info = {'rows': rows}
+    if not _STATE['enabled']:
+        yield info
+        return
+
+    rss0, peak0 = _rss_mb(), _peak_rss_mb()
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    try:
+        yield info
+    finally:
+        t1 = time.perf_counter()
+        _STATE['records'].append({
+            'stage'        : name,
+            'layer'        : layer,
+            'rows'         : info['rows'],
+            'start_s'      : t0 - _STATE['origin'],
+            'wall_s'       : t1 - t0,
+            'cpu_s'        : time.process_time() - cpu0,
+            'rss_delta_mb' : _rss_mb() - rss0,
+            'peak_delta_mb': _peak_rss_mb() - peak0,
+            'thread'       : threading.get_ident(),
+        })
+
+
+def profiled(layer: str = '') -> Callable:
+    """
+    Decorator recording every call of a layer function as a stage.
+
+    Rows are taken from the first argument with a shape, or from the
+    return value (first element of a tuple) when no argument has one.
+
+    Args:
+        layer (str): Pipeline layer label, e.g. 'LAYER 3'.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _STATE['enabled']:
+                return fn(*args, **kwargs)
+            values = list(args) + list(kwargs.values())
+            rows = next((r for r in map(_rows, values) if r is not None), None)
+            with stage(fn.__name__, layer, rows) as info:
+                out = fn(*args, **kwargs)
+                if info['rows'] is None:
+                    info['rows'] = _rows(out[0] if isinstance(out, tuple) else out)
+            return out
+        return wrapper
+    return decorator
+
+
+def profile_records() -> pd.DataFrame:
+    """All recorded stages, in completion order."""
+    return pd.DataFrame(_STATE['records'])
+
+
+def profile_summary() -> pd.DataFrame:
+    """
+    Per-stage totals: calls, wall/CPU time, memory growth and rows.
+
+    Nested stages (e.g. train_xgboost inside k_fold_cross_validation)
+    are counted in both the inner and the outer stage.
+
+    Returns:
+        pd.DataFrame: One row per stage, slowest first.
+    """
+    records = profile_records()
+    if records.empty:
+        return records
+    summary = records.groupby(['layer', 'stage']).agg(
+        calls=('wall_s', 'size'),
+        wall_s=('wall_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        rss_delta_mb=('rss_delta_mb', 'sum'),
+        peak_delta_mb=('peak_delta_mb', 'max'),
+        rows=('rows', 'sum'),
+    )
+    summary['rows_per_s'] = summary['rows'] / summary['wall_s']
+    return summary.sort_values('wall_s', ascending=False)
+
+
+def write_chrome_trace(path: str = 'profile_trace.json') -> None:
+    """
+    Write recorded stages in Chrome trace format.
+
+    Open with chrome://tracing or https://ui.perfetto.dev.
+
+    Args:
+        path (str): Output JSON file.
+    """
+    pid = os.getpid()
+    events = [
+        {
+            'name': r['stage'],
+            'cat' : r['layer'] or 'stage',
+            'ph'  : 'X',
+            'ts'  : r['start_s'] * 1e6,
+            'dur' : r['wall_s'] * 1e6,
+            'pid' : pid,
+            'tid' : r['thread'],
+            'args': {k: r[k] for k in ('rows', 'cpu_s', 'rss_delta_mb', 'peak_delta_mb')},
+        }
+        for r in _STATE['records']
+    ]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,231 @@
+import argparse
+import numpy as np
+import pandas as pd
+import xgboost
+from typing import Any
+from xgboost import XGBClassifier
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from Credit_Model import (
+    load_data,
+    feature_engineering,
+    prepare_model_inputs,
+    best_iteration,
+    optimal_threshold,
+    QuantizedTrainingSet,
+    train_xgboost_dmatrix,
+)
+from scoring import predict_pd, load_scoring_model, save_scoring_model
+from calibration import PDCalibrator, load_calibrator
+from monitoring import build_reference, save_reference
+
+# ══════════════════════════════════════════════════════════════════
+# INCREMENTAL MODEL REFRESH
+# Monthly update from new performance data without retraining on the
+# full history:
+#   XGBoost  — boosting continues from the persisted booster (trees up
+#              to best_iteration) on the new rows, early-stopped on a
+#              separate split of the same rows
+#   Logistic — warm-started lbfgs from the current coefficients
+# The candidate is compared with the current model on a third split
+# it never saw (neither for training nor for early stopping) and only
+# promoted when its AUC is not worse by more than the tolerance.
+#
+#   python refresh.py --model-dir model --data new_month.csv --out model_next
+# ══════════════════════════════════════════════════════════════════
+
+DROP_COLS = ['HOME_EQUITY', 'TOTAL_DEBT']
+
+
+def compare_auc(
+    current: Any,
+    candidate: Any,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    tolerance: float = 0.0
+) -> dict:
+    """
+    AUC of the current and candidate models on the same rows.
+
+    Args:
+        current   (Any)         : Model in production.
+        candidate (Any)         : Refreshed model.
+        X_val     (pd.DataFrame): Evaluation features.
+        y_val     (pd.Series)   : Evaluation labels.
+        tolerance (float)       : Allowed AUC drop for promotion.
+
+    Returns:
+        dict: auc_current, auc_candidate, delta and promote.
+    """
+    auc_current = roc_auc_score(y_val, predict_pd(current, X_val))
+    auc_candidate = roc_auc_score(y_val, predict_pd(candidate, X_val))
+    return {
+        'auc_current'  : auc_current,
+        'auc_candidate': auc_candidate,
+        'delta'        : auc_candidate - auc_current,
+        'promote'      : auc_candidate >= auc_current - tolerance,
+    }
+
+
+def continue_boosting(
+    model: XGBClassifier,
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    n_rounds: int = 200,
+    random_state: int = 29,
+    params: dict | None = None,
+    early_stopping_rounds: int | None = 50
+) -> XGBClassifier:
+    """
+    Add trees to a fitted model using new rows only.
+
+    Args:
+        model                 (XGBClassifier): Current model.
+        X_new                 (pd.DataFrame) : New training features.
+        y_new                 (pd.Series)    : New training labels.
+        X_val                 (pd.DataFrame) : Validation features for early stopping.
+        y_val                 (pd.Series)    : Validation labels.
+        n_rounds              (int)          : Maximum rounds to add.
+        random_state          (int)          : Random state for reproducibility.
+        params                (dict | None)  : Overrides for XGB_PARAMS.
+        early_stopping_rounds (int | None)   : Rounds without improvement before stopping.
+
+    Returns:
+        XGBClassifier: Refreshed model.
+    """
+    columns = model.get_booster().feature_names
+    dataset = QuantizedTrainingSet(X_new[columns], y_new)
+    dval = xgboost.QuantileDMatrix(X_val[columns].to_numpy(dtype=np.float32), y_val.to_numpy(),
+                                   feature_names=columns, ref=dataset.full)
+    return train_xgboost_dmatrix(
+        dataset.full, dval, random_state,
+        early_stopping_rounds=early_stopping_rounds,
+        params={**(params or {}), 'n_estimators': n_rounds},
+        base_model=model
+    )
+
+
+def refresh_logistic(
+    model: LogisticRegression,
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    max_iter: int = 50
+) -> LogisticRegression:
+    """
+    Warm-started update of the logistic baseline on new rows.
+
+    lbfgs starts from the current coefficients and runs at most
+    max_iter iterations, so the fit moves toward the new data without
+    a full retrain. The current model is left untouched.
+
+    Args:
+        model    (LogisticRegression): Current baseline.
+        X_new    (pd.DataFrame)      : New features (same columns as the model).
+        y_new    (pd.Series)         : New labels.
+        max_iter (int)               : Solver iterations for the update.
+
+    Returns:
+        LogisticRegression: Updated copy.
+    """
+    candidate = clone(model).set_params(warm_start=True, max_iter=max_iter)
+    candidate.coef_ = model.coef_.copy()
+    candidate.intercept_ = model.intercept_.copy()
+    candidate.classes_ = model.classes_
+    return candidate.fit(X_new[list(model.feature_names_in_)], y_new)
+
+
+def refresh_model_dir(
+    model_dir: str,
+    new_data: pd.DataFrame,
+    out_dir: str,
+    target: str = 'BAD',
+    n_rounds: int = 200,
+    val_size: float = 0.2,
+    compare_size: float = 0.2,
+    tolerance: float = 0.0,
+    random_state: int = 29
+) -> dict:
+    """
+    Refresh a saved scoring artifact with a batch of new outcomes.
+
+    New rows are feature-engineered and split three ways, stratified:
+    training rows for the added trees, early-stopping rows that also
+    fit the calibrator and threshold (the role of the validation fold
+    in main()), and comparison rows used only for the promotion
+    decision. When promoted, out_dir gets the refreshed booster, the
+    threshold re-selected on the new (calibrated) scale, the calibrator
+    refit with the same method if the artifact had one, and a drift
+    reference rebuilt from the refresh rows, so later monitoring
+    measures drift against the population the new model was fitted on.
+
+    Args:
+        model_dir    (str)         : Current artifact (scoring.save_scoring_model()).
+        new_data     (pd.DataFrame): New cleaned rows with observed outcomes.
+        out_dir      (str)         : Directory for the refreshed artifact.
+        target       (str)         : Label column.
+        n_rounds     (int)         : Maximum boosting rounds to add.
+        val_size     (float)       : Share of new rows for early stopping and calibration.
+        compare_size (float)       : Share of new rows held out for the promotion decision.
+        tolerance    (float)       : Allowed AUC drop for promotion.
+        random_state (int)         : Reproducibility seed.
+
+    Returns:
+        dict: compare_auc() result plus the tree counts before and after.
+    """
+    model, meta = load_scoring_model(model_dir)
+    X_new, X_hold, y_new, y_hold = prepare_model_inputs(
+        df=feature_engineering(new_data), target=target, drop_cols=DROP_COLS,
+        test_size=val_size + compare_size, random_state=random_state
+    )
+    X_val, X_cmp, y_val, y_cmp = train_test_split(
+        X_hold, y_hold, test_size=compare_size / (val_size + compare_size),
+        random_state=random_state, stratify=y_hold
+    )
+
+    candidate = continue_boosting(model, X_new, y_new, X_val, y_val,
+                                  n_rounds=n_rounds, random_state=random_state)
+    report = compare_auc(model, candidate, X_cmp, y_cmp, tolerance)
+    report['trees_current'] = best_iteration(model)
+    report['trees_candidate'] = best_iteration(candidate)
+
+    print(f"AUC on held-out new rows: {report['auc_current']:.4f} current  →  "
+          f"{report['auc_candidate']:.4f} refreshed  ({report['delta']:+.4f})")
+    print(f"Trees: {report['trees_current']} → {report['trees_candidate']}")
+
+    if not report['promote']:
+        print("Refreshed model not promoted")
+        return report
+
+    # Calibrator and threshold on the candidate's scale, as in main()
+    pd_val = predict_pd(candidate, X_val)
+    calibrator = load_calibrator(model_dir)
+    if calibrator is not None:
+        calibrator = PDCalibrator(calibrator.method, calibrator.bins).fit(pd_val, y_val)
+        pd_val = calibrator.apply(pd_val)
+    best_thr = optimal_threshold(pd_val, y_val)['best_thr']
+
+    save_scoring_model(candidate, out_dir, best_thr, meta['haircut'])
+    if calibrator is not None:
+        calibrator.save(out_dir)
+    save_reference(build_reference(X_new, pd_val, y_val), out_dir)
+    print(f"Threshold: {meta['best_thr']:.4f} → {best_thr:.4f}")
+    print(f"Refreshed model written to {out_dir}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Warm-start refresh of the PD model')
+    parser.add_argument('--model-dir', required=True, help='Current scoring artifact')
+    parser.add_argument('--data', required=True, help='New cleaned rows with outcomes (CSV)')
+    parser.add_argument('--out', required=True, help='Directory for the refreshed artifact')
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--tolerance', type=float, default=0.0)
+    args = parser.parse_args()
+
+    refresh_model_dir(args.model_dir, load_data(args.data), args.out,
+                      n_rounds=args.rounds, tolerance=args.tolerance)
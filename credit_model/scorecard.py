@@ -0,0 +1,208 @@
+import json
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from Credit_Model import load_data, prepare_model_inputs, train_logistic_regression
+
+# ══════════════════════════════════════════════════════════════════
+# POINTS SCORECARD
+# Built on the logistic baseline:
+#   1. Each raw feature is binned on training quantiles; bins that are
+#      too small or contain only goods or only bads are merged into a
+#      neighbour. Missing values get their own bin.
+#   2. Bins are replaced by their Weight of Evidence,
+#        WOE = ln(%goods / %bads)
+#      and train_logistic_regression() is fitted on the WOE values.
+#   3. Log-odds are scaled to points:
+#        score  = offset + factor · ln(good:bad odds)
+#        factor = PDO / ln 2,  offset = base_score − factor · ln(base_odds)
+# The compiled scorer keeps per feature only the bin edges and the
+# points per bin; scoring is one np.searchsorted per feature plus a
+# table lookup.
+# ══════════════════════════════════════════════════════════════════
+
+WOE_SMOOTHING = 0.5
+
+
+def woe_edges(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_bins: int = 10,
+    min_share: float = 0.05
+) -> np.ndarray:
+    """
+    Inner bin edges for one feature.
+
+    Bin i holds edges[i-1] < x <= edges[i]. Starts from quantile edges
+    and removes edges until every bin has at least min_share of the
+    rows and both goods and bads.
+
+    Args:
+        x         (np.ndarray): Feature values (NaN ignored).
+        y         (np.ndarray): Binary target (1 = bad).
+        max_bins  (int)       : Initial number of quantile bins.
+        min_share (float)     : Minimum share of non-missing rows per bin.
+
+    Returns:
+        np.ndarray: Sorted inner edges (len = bins - 1).
+    """
+    valid = ~np.isnan(x)
+    x, y = x[valid], y[valid]
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, max_bins + 1)[1:-1]))
+    edges = edges[edges < x.max()]
+
+    while len(edges):
+        idx = np.searchsorted(edges, x, side='left')
+        n = np.bincount(idx, minlength=len(edges) + 1)
+        bads = np.bincount(idx, weights=y, minlength=len(edges) + 1)
+        weak = np.flatnonzero((n < min_share * len(x)) | (bads == 0) | (bads == n))
+        if not len(weak):
+            break
+        i = weak[0]
+        # merge with the right neighbour (left for the last bin)
+        edges = np.delete(edges, min(i, len(edges) - 1))
+    return edges
+
+
+class Scorecard:
+    """
+    WOE logistic scorecard with points scaling and a lookup-table scorer.
+
+    Args:
+        pdo        (float): Points to double the good:bad odds.
+        base_score (float): Score at base_odds.
+        base_odds  (float): Good:bad odds at base_score.
+        max_bins   (int)  : Initial quantile bins per feature.
+        min_share  (float): Minimum share of rows per bin.
+    """
+
+    def __init__(
+        self,
+        pdo: float = 20.0,
+        base_score: float = 600.0,
+        base_odds: float = 50.0,
+        max_bins: int = 10,
+        min_share: float = 0.05
+    ):
+        self.pdo = pdo
+        self.base_score = base_score
+        self.base_odds = base_odds
+        self.max_bins = max_bins
+        self.min_share = min_share
+        self.factor = pdo / np.log(2)
+        self.offset = base_score - self.factor * np.log(base_odds)
+        self.features = []
+        self.edges = {}
+        self.woe = {}
+        self.points = {}
+
+    def _bin(self, feature: str, x: np.ndarray) -> np.ndarray:
+        """Bin index per value; the last slot is the missing-value bin."""
+        edges = self.edges[feature]
+        return np.where(np.isnan(x), len(edges) + 1, np.searchsorted(edges, x, side='left'))
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Raw features → WOE values."""
+        return pd.DataFrame({
+            f: self.woe[f][self._bin(f, X[f].to_numpy(dtype=float))] for f in self.features
+        }, index=X.index)
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> 'Scorecard':
+        """
+        Bin, compute WOE, fit the logistic model and scale to points.
+
+        Args:
+            X (pd.DataFrame): Raw applicant features.
+            y (pd.Series)   : Binary target (1 = default).
+
+        Returns:
+            Scorecard: self.
+        """
+        y_arr = y.to_numpy(dtype=float)
+        n_bad = y_arr.sum()
+        n_good = len(y_arr) - n_bad
+        self.features = list(X.columns)
+
+        for f in self.features:
+            x = X[f].to_numpy(dtype=float)
+            self.edges[f] = woe_edges(x, y_arr, self.max_bins, self.min_share)
+            idx = self._bin(f, x)
+            slots = len(self.edges[f]) + 2
+            n = np.bincount(idx, minlength=slots)
+            bads = np.bincount(idx, weights=y_arr, minlength=slots)
+            goods = n - bads
+            woe = np.log(((goods + WOE_SMOOTHING) / n_good) / ((bads + WOE_SMOOTHING) / n_bad))
+            woe[n == 0] = 0.0   # unseen bins (e.g. missing values) are neutral
+            self.woe[f] = woe
+
+        self.model = train_logistic_regression(self.transform(X), y)
+
+        # points = offset + factor · ln(odds_good), spread over the features
+        intercept = self.model.intercept_[0]
+        share = (self.offset - self.factor * intercept) / len(self.features)
+        for f, beta in zip(self.features, self.model.coef_[0]):
+            self.points[f] = share - self.factor * beta * self.woe[f]
+        return self
+
+    def score(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Total points per application from the lookup tables.
+
+        Args:
+            X (pd.DataFrame): Raw applicant features (scorecard columns).
+
+        Returns:
+            np.ndarray: Score per row (higher = safer).
+        """
+        total = np.zeros(len(X))
+        for f in self.features:
+            total += self.points[f][self._bin(f, X[f].to_numpy(dtype=float))]
+        return total
+
+    def score_to_pd(self, score: np.ndarray) -> np.ndarray:
+        """PD implied by a score: 1 / (1 + exp((score − offset) / factor))."""
+        return 1.0 / (1.0 + np.exp((np.asarray(score) - self.offset) / self.factor))
+
+    def table(self) -> pd.DataFrame:
+        """One row per feature bin: range, WOE and points."""
+        rows = []
+        for f in self.features:
+            bounds = np.concatenate(([-np.inf], self.edges[f], [np.inf]))
+            for i in range(len(bounds) - 1):
+                rows.append((f, f'({bounds[i]:,.4g}, {bounds[i + 1]:,.4g}]',
+                             self.woe[f][i], self.points[f][i]))
+            rows.append((f, 'missing', self.woe[f][-1], self.points[f][-1]))
+        return pd.DataFrame(rows, columns=['feature', 'bin', 'WOE', 'points'])
+
+    def save(self, path: str = 'scorecard.json') -> None:
+        """Persist the compiled lookup tables."""
+        payload = {
+            'scaling' : {'pdo': self.pdo, 'base_score': self.base_score, 'base_odds': self.base_odds},
+            'features': {f: {'edges': self.edges[f].tolist(), 'woe': self.woe[f].tolist(),
+                             'points': self.points[f].tolist()} for f in self.features},
+        }
+        with open(path, 'w') as fh:
+            json.dump(payload, fh, indent=2)
+
+    @classmethod
+    def load(cls, path: str = 'scorecard.json') -> 'Scorecard':
+        """Load a scorer written by save() (scoring only; no logistic model)."""
+        with open(path) as fh:
+            payload = json.load(fh)
+        card = cls(**payload['scaling'])
+        for f, spec in payload['features'].items():
+            card.features.append(f)
+            card.edges[f] = np.asarray(spec['edges'], dtype=float)
+            card.woe[f] = np.asarray(spec['woe'], dtype=float)
+            card.points[f] = np.asarray(spec['points'], dtype=float)
+        return card
+
+
+if __name__ == '__main__':
+    X_train, X_test, y_train, y_test = prepare_model_inputs(
+        df=load_data('hmeq_cleaned.csv'), target='BAD', drop_cols=[])
+    card = Scorecard().fit(X_train, y_train)
+    card.save()
+    print(card.table().to_string(index=False))
+    print(f"\nScorecard AUC (test): {roc_auc_score(y_test, -card.score(X_test)):.4f}")
@@ -0,0 +1,184 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from xgboost import XGBClassifier
+
+from Credit_Model import best_iteration
+
+# ══════════════════════════════════════════════════════════════════
+# FAST SCORING ENGINE
+# Runs the forest once per row on a contiguous float32 matrix and
+# derives labels from the probabilities. XGBoost models go through
+# Booster.inplace_predict (no DMatrix construction, no pandas),
+# which already spreads each batch over the booster's nthread
+# threads, so XGBoost batches run one after another. Other models
+# score their batches on a thread pool.
+# ══════════════════════════════════════════════════════════════════
+
+
+def feature_names(model: Any) -> list[str] | None:
+    """Feature order the model was trained on, if it recorded one."""
+    if isinstance(model, XGBClassifier):
+        return model.get_booster().feature_names
+    names = getattr(model, 'feature_names_in_', None)
+    return None if names is None else list(names)
+
+
+def to_matrix(X: pd.DataFrame | np.ndarray, columns: list[str] | None = None) -> np.ndarray:
+    """
+    Convert features to a C-contiguous float32 matrix.
+
+    Args:
+        X       (pd.DataFrame | np.ndarray): Feature table.
+        columns (list[str] | None)         : Column order to enforce when X
+                                             is a DataFrame (e.g. feature_names()).
+
+    Returns:
+        np.ndarray: 2-D float32 array; arrays already in that layout are
+                    returned without copying.
+    """
+    if isinstance(X, pd.DataFrame):
+        if columns is not None:
+            X = X[columns]
+        X = X.to_numpy(dtype=np.float32)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def _predict_block(model: Any, X: np.ndarray, n_trees: int | None) -> np.ndarray:
+    """Probability of default for one contiguous row block."""
+    if isinstance(model, XGBClassifier):
+        return model.get_booster().inplace_predict(
+            X, iteration_range=(0, n_trees), predict_type='value'
+        )
+    return model.predict_proba(X)[:, 1]
+
+
+def predict_pd(
+    model: Any,
+    X: pd.DataFrame | np.ndarray,
+    batch_size: int = 100_000,
+    n_threads: int | None = None
+) -> np.ndarray:
+    """
+    Probability of default from a single pass of the model.
+
+    XGBoost models only use the trees up to best_iteration() and score
+    batches sequentially, each using the booster's own threads; other
+    models score batches on a pool of n_threads.
+
+    Args:
+        model      (Any)                      : XGBClassifier or any model with predict_proba().
+        X          (pd.DataFrame | np.ndarray): Features (DataFrames are aligned
+                                                to the training column order).
+        batch_size (int)                      : Rows per batch.
+        n_threads  (int | None)               : Batches scored concurrently for
+                                                non-XGBoost models (default: CPU count).
+
+    Returns:
+        np.ndarray: PD per row (empty for an empty X).
+    """
+    X = to_matrix(X, feature_names(model) if isinstance(X, pd.DataFrame) else None)
+    is_xgb = isinstance(model, XGBClassifier)
+    n_trees = best_iteration(model) if is_xgb else None
+
+    n = X.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    if n <= batch_size:
+        return np.asarray(_predict_block(model, X, n_trees), dtype=np.float64)
+
+    out = np.empty(n, dtype=np.float64)
+    starts = range(0, n, batch_size)
+
+    def score(start: int) -> None:
+        stop = min(start + batch_size, n)
+        out[start:stop] = _predict_block(model, X[start:stop], n_trees)
+
+    if is_xgb:
+        for start in starts:
+            score(start)
+    else:
+        with ThreadPoolExecutor(max_workers=n_threads or os.cpu_count()) as pool:
+            list(pool.map(score, starts))
+
+    return out
+
+
+def score_book(
+    model: Any,
+    X: pd.DataFrame | np.ndarray,
+    threshold: float,
+    batch_size: int = 100_000,
+    n_threads: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Labels and PDs for a book, running the model once.
+
+    Drop-in fast path for model_predictions(); labels use the same
+    cutoff rule as compute_el() (PD >= threshold).
+
+    Args:
+        model      (Any)                      : Fitted PD model.
+        X          (pd.DataFrame | np.ndarray): Features.
+        threshold  (float)                    : Classification cutoff (e.g. best_thr).
+        batch_size (int)                      : Rows per batch.
+        n_threads  (int | None)               : Batches scored concurrently.
+
+    Returns:
+        tuple: (labels, probabilities of default).
+    """
+    proba = predict_pd(model, X, batch_size=batch_size, n_threads=n_threads)
+    return (proba >= threshold).astype(int), proba
+
+
+# ══════════════════════════════════════════════════════════════════
+# MODEL ARTIFACT
+# A directory holding the booster in XGBoost's native JSON format
+# plus the metadata scoring needs (threshold, haircut, features).
+# ══════════════════════════════════════════════════════════════════
+
+def save_scoring_model(
+    model: XGBClassifier,
+    directory: str,
+    best_thr: float,
+    haircut: float
+) -> None:
+    """
+    Persist a fitted PD model and its scoring metadata.
+
+    Args:
+        model     (XGBClassifier): Fitted XGBoost classifier.
+        directory (str)          : Output directory (created if missing).
+        best_thr  (float)        : Classification threshold from curva_roc().
+        haircut   (float)        : Foreclosure cost fraction used for LGD.
+    """
+    os.makedirs(directory, exist_ok=True)
+    model.save_model(os.path.join(directory, 'booster.json'))
+    meta = {
+        'best_thr'      : float(best_thr),
+        'haircut'       : float(haircut),
+        'best_iteration': best_iteration(model),
+        'features'      : feature_names(model),
+    }
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_scoring_model(directory: str) -> tuple[XGBClassifier, dict]:
+    """
+    Load a model saved by save_scoring_model().
+
+    Args:
+        directory (str): Artifact directory.
+
+    Returns:
+        tuple: (model, metadata dict).
+    """
+    model = XGBClassifier()
+    model.load_model(os.path.join(directory, 'booster.json'))
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    return model, meta
@@ -0,0 +1,341 @@
+import json
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Credit_Model import feature_engineering, compute_el
+from scoring import load_scoring_model, predict_pd
+from calibration import load_calibrator
+
+# ══════════════════════════════════════════════════════════════════
+# LOCAL SCORING SERVICE
+# HTTP/JSON service returning PD, LGD and EL for HMEQ applications.
+# Runs fully offline on the standard library HTTP server.
+#
+#   POST /score    one application (object) or several (list)
+#   GET  /metrics  request latency histogram and batch statistics
+#   GET  /health   liveness check
+#
+# Concurrent requests are queued and coalesced into micro-batches so
+# the booster scores many applications per call.
+# ══════════════════════════════════════════════════════════════════
+
+# Columns added by feature_engineering(); never expected in requests
+DERIVED_COLS = ['TOTAL_DEBT', 'LTV', 'CLTV', 'HOME_EQUITY',
+                'EQUITY_RATIO', 'DELINQ_RATIO', 'UNDERWATER']
+
+# Fields that must be strictly positive (EAD for LGD/EL, collateral for LTV)
+POSITIVE_COLS = ['MORTDUE', 'VALUE']
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram in milliseconds."""
+
+    EDGES_MS = [0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 25, 50, 100, 250, 1000]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = np.zeros(len(self.EDGES_MS) + 1, dtype=np.int64)
+        self._sum = 0.0
+
+    def observe(self, ms: float) -> None:
+        """Record one latency sample."""
+        i = int(np.searchsorted(self.EDGES_MS, ms))
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket edge containing quantile q (inf for the overflow bucket)."""
+        with self._lock:
+            counts = self._counts.copy()
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(counts), q * total))
+        return self.EDGES_MS[i] if i < len(self.EDGES_MS) else float('inf')
+
+    def snapshot(self) -> dict:
+        """Bucket counts plus count, mean and approximate p50/p95/p99."""
+        with self._lock:
+            counts = self._counts.tolist()
+            total_ms = self._sum
+        n = sum(counts)
+        labels = [f'<={e}' for e in self.EDGES_MS] + [f'>{self.EDGES_MS[-1]}']
+        return {
+            'count'  : n,
+            'mean_ms': total_ms / n if n else 0.0,
+            'p50_ms' : self.quantile(0.50),
+            'p95_ms' : self.quantile(0.95),
+            'p99_ms' : self.quantile(0.99),
+            'buckets': dict(zip(labels, counts)),
+        }
+
+
+class ScoringEngine:
+    """
+    Warm-loaded PD model plus the EL pipeline for raw applications.
+
+    Args:
+        model_dir (str): Artifact written by scoring.save_scoring_model().
+    """
+
+    def __init__(self, model_dir: str):
+        self.model, self.meta = load_scoring_model(model_dir)
+        self.calibrator = load_calibrator(model_dir)
+        self.features = self.meta['features']
+        self.job_cols = [c for c in self.features if c.startswith('JOB_')]
+        self.required = [c for c in self.features
+                         if c not in DERIVED_COLS and c not in self.job_cols]
+
+        # Warm-up call so the first request does not pay lazy initialisation
+        predict_pd(self.model, np.zeros((1, len(self.features)), dtype=np.float32))
+
+    def validate(self, application: dict) -> dict:
+        """
+        Check and coerce one raw application.
+
+        Required columns must be present and finite numbers (numeric
+        strings are accepted); optional JOB_ flags must be numeric or
+        boolean. MORTDUE and VALUE must be positive.
+
+        Args:
+            application (dict): Raw application from the request body.
+
+        Returns:
+            dict: Copy with every model column as float.
+
+        Raises:
+            ValueError: On a missing, non-numeric or out-of-range field.
+        """
+        if not isinstance(application, dict):
+            raise ValueError("Each application must be a JSON object")
+        missing = [c for c in self.required if application.get(c) is None]
+        if missing:
+            raise ValueError(f"Missing fields: {missing}")
+
+        clean = dict(application)
+        for c in self.features:
+            if c not in application or c in DERIVED_COLS:
+                continue
+            value = application[c]
+            try:
+                if isinstance(value, (dict, list)):
+                    raise TypeError
+                clean[c] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Field {c} is not numeric: {value!r}") from None
+            if not np.isfinite(clean[c]):
+                raise ValueError(f"Field {c} is not finite: {value!r}")
+
+        bad = [c for c in POSITIVE_COLS if c in clean and clean[c] <= 0]
+        if bad:
+            raise ValueError(f"Fields must be positive: {bad}")
+        return clean
+
+    def score(self, applications: list[dict]) -> list[dict]:
+        """
+        PD, LGD and EL for a batch of applications.
+
+        Applies feature_engineering(), the booster, the calibrator (if the
+        artifact has one) and compute_el() with the threshold and haircut
+        stored in the artifact. One-hot JOB_ flags that an application
+        does not send default to 0, whatever its batch-mates send.
+
+        Args:
+            applications (list[dict]): Raw applications (cleaned HMEQ columns).
+
+        Returns:
+            list[dict]: One result per application, in input order.
+        """
+        df = feature_engineering(pd.DataFrame.from_records(applications))
+        X = df.reindex(columns=self.features, fill_value=0)
+        # flags missing from only some records arrive as NaN, not 0
+        X[self.job_cols] = X[self.job_cols].fillna(0)
+        proba = predict_pd(self.model, X)
+        df['default_proba'] = proba if self.calibrator is None else self.calibrator.apply(proba)
+        df = compute_el(df, self.meta['best_thr'], self.meta['haircut'], inplace=True)
+
+        return [
+            {
+                'pd'       : float(p),
+                'lgd'      : float(lgd),
+                'el_pct'   : float(el_pct),
+                'el_amount': float(el),
+                'decision' : 'REJECT' if pred == 1 else 'APPROVE',
+            }
+            for p, lgd, el_pct, el, pred in zip(
+                df['default_proba'], df['LGD'], df['EL_pct'],
+                df['EL_amount'], df['model_prediction'])
+        ]
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-application requests into batches.
+
+    A background thread waits for the first queued request, then keeps
+    collecting until max_batch requests are queued or max_wait_ms has
+    passed, and scores them with one engine call. If that call fails,
+    the batch is rescored one application at a time so only the
+    offending request gets the error.
+
+    Args:
+        engine      (ScoringEngine): Scoring backend.
+        max_batch   (int)          : Largest batch sent to the booster.
+        max_wait_ms (float)        : Longest a request waits for batch-mates.
+    """
+
+    def __init__(self, engine: ScoringEngine, max_batch: int = 64, max_wait_ms: float = 1.0):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.n_batches = 0
+        self.n_requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, application: dict) -> Future:
+        """Queue one application; the Future resolves to its result dict."""
+        future = Future()
+        self._queue.put((application, future))
+        return future
+
+    def _collect(self) -> list[tuple[dict, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            self.n_batches += 1
+            self.n_requests += len(batch)
+            try:
+                results = self.engine.score([app for app, _ in batch])
+            except Exception:
+                for app, future in batch:
+                    self._score_one(app, future)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _score_one(self, application: dict, future: Future) -> None:
+        try:
+            future.set_result(self.engine.score([application])[0])
+        except Exception as exc:
+            future.set_exception(exc)
+
+
+def make_handler(batcher: MicroBatcher, latency: LatencyHistogram) -> type:
+    """Build the request handler class bound to a batcher and histogram."""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, status: int, payload: dict | list) -> None:
+            try:
+                body = json.dumps(payload, allow_nan=False).encode()
+            except ValueError:
+                status, body = 500, json.dumps({'error': 'non-finite result'}).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif self.path == '/metrics':
+                self._send(200, {
+                    'latency_ms': latency.snapshot(),
+                    'batches'   : batcher.n_batches,
+                    'mean_batch': batcher.n_requests / max(batcher.n_batches, 1),
+                })
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self._send(404, {'error': 'not found'})
+                return
+
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length))
+                applications = payload if isinstance(payload, list) else [payload]
+                applications = [batcher.engine.validate(app) for app in applications]
+            except ValueError as exc:
+                self._send(400, {'error': str(exc)})
+                return
+
+            futures = [batcher.submit(app) for app in applications]
+            try:
+                results = [f.result() for f in futures]
+            except Exception as exc:
+                self._send(500, {'error': str(exc)})
+                return
+
+            latency.observe((time.perf_counter() - start) * 1000)
+            self._send(200, results if isinstance(payload, list) else results[0])
+
+        def log_message(self, format, *args):
+            pass   # keep per-request logging off the hot path
+
+    return Handler
+
+
+def serve(
+    model_dir: str,
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    max_batch: int = 64,
+    max_wait_ms: float = 1.0
+) -> None:
+    """
+    Load the model and serve scoring requests until interrupted.
+
+    Args:
+        model_dir   (str)  : Artifact directory from scoring.save_scoring_model().
+        host        (str)  : Bind address (localhost by default).
+        port        (int)  : TCP port.
+        max_batch   (int)  : Micro-batch size limit.
+        max_wait_ms (float): Micro-batch collection window.
+    """
+    engine = ScoringEngine(model_dir)
+    batcher = MicroBatcher(engine, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, LatencyHistogram()))
+    print(f"Scoring service on http://{host}:{port}  (model: {model_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HMEQ PD/EL scoring service')
+    parser.add_argument('--model-dir', default='model')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    serve(args.model_dir, args.host, args.port, args.max_batch, args.max_wait_ms)
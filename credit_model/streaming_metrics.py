@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Iterable
+
+from Credit_Model import portfolio_totals, metrics_from_totals
+
+# ══════════════════════════════════════════════════════════════════
+# STREAMING, MERGEABLE PORTFOLIO METRICS
+# Every accumulator consumes compute_el() output one chunk at a time
+# and supports merge(), so partitions can be processed independently
+# (other processes or machines) and combined at the end:
+#   KLLSketch            — PD quantiles for the risk-bucket edges
+#   BucketAccumulator    — per-bucket counts and sums
+#   PortfolioAccumulator — the sums behind compute_portfolio_metrics()
+# The full book is never materialized.
+# ══════════════════════════════════════════════════════════════════
+
+BUCKET_LABELS = ['Low', 'Medium', 'High', 'Very High']
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Items live in levels; an item at level h stands for 2^h inputs.
+    When a level exceeds its capacity it is sorted and every other
+    item (random offset) is promoted. Memory is O(k log(n/k)).
+
+    Args:
+        k    (int): Accuracy parameter (rank error roughly 1.7 / k).
+        seed (int): Seed for the compaction coin flips.
+    """
+
+    def __init__(self, k: int = 400, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self) -> None:
+        while True:
+            full = [h for h, items in enumerate(self.levels) if len(items) >= self._capacity(h)]
+            if not full:
+                return
+            h = full[0]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(self.levels[h])
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            items = items[:len(items) - len(keep)]
+            promoted = items[self._rng.integers(2)::2]
+
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            self.levels[h] = keep
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Fold another sketch into this one (in place) and return self."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: float | np.ndarray) -> np.ndarray:
+        """Approximate quantile(s) of everything seen so far."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h)
+                                  for h, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, cum = values[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, np.asarray(q) * cum[-1], side='left')
+        return values[np.minimum(idx, len(values) - 1)]
+
+
+class BucketAccumulator:
+    """
+    Per-bucket sums for risk_bucket_table() over streamed chunks.
+
+    Buckets follow pd.qcut: (edge_i, edge_i+1], with the lowest bucket
+    also catching everything below the first inner edge.
+
+    Args:
+        edges  (np.ndarray): Bucket edges including min and max (len = buckets + 1).
+        labels (list[str]) : Bucket names.
+    """
+
+    SUMS = ['EAD', 'EL', 'PD', 'RWA', 'Capital']
+    SOURCES = {'EAD': 'MORTDUE', 'EL': 'EL_amount', 'PD': 'default_proba',
+               'RWA': 'RWA', 'Capital': 'capital'}
+
+    def __init__(self, edges: np.ndarray, labels: list[str] = BUCKET_LABELS):
+        self.inner = np.asarray(edges)[1:-1]
+        self.labels = labels
+        self.count = np.zeros(len(labels))
+        self.sums = {name: np.zeros(len(labels)) for name in self.SUMS}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Accumulate one compute_el() chunk."""
+        bucket = np.searchsorted(self.inner, chunk['default_proba'].to_numpy(), side='left')
+        n = len(self.labels)
+        self.count += np.bincount(bucket, minlength=n)
+        for name, col in self.SOURCES.items():
+            if col in chunk:
+                self.sums[name] += np.bincount(bucket, weights=chunk[col].to_numpy(), minlength=n)
+
+    def merge(self, other: 'BucketAccumulator') -> 'BucketAccumulator':
+        """Add another accumulator's totals (same edges) and return self."""
+        self.count += other.count
+        for name in self.SUMS:
+            self.sums[name] += other.sums[name]
+        return self
+
+    def table(self) -> pd.DataFrame:
+        """Same layout as risk_bucket_table()."""
+        s = self.sums
+        table = pd.DataFrame({
+            'n_loans': self.count.astype(int),
+            'EAD'    : s['EAD'],
+            'EL'     : s['EL'],
+            'Avg_PD' : s['PD'] / self.count,
+            'RWA'    : s['RWA'],
+            'Capital': s['Capital'],
+        }, index=pd.CategoricalIndex(self.labels, name='risk_bucket'))
+        table['EL_pct'] = table['EL'] / table['EAD']
+        table['Capital_pct'] = table['Capital'] / table['EAD']
+        return table[table['n_loans'] > 0]
+
+
+class PortfolioAccumulator:
+    """
+    Mergeable sums behind compute_portfolio_metrics().
+
+    Each chunk is reduced with portfolio_totals(); only the sums are kept.
+
+    Args:
+        annual_rate   (float): Annual interest rate.
+        months        (int)  : Total number of monthly payments.
+        payments_made (int)  : Month at which a missed default is lost.
+        loss_rate     (float): Loss fraction applied to missed defaults.
+    """
+
+    FIELDS = ['n', 'ead', 'el', 'pd_sum', 'pd_ead', 'new_portfolio',
+              'missed_balance', 'opportunity_cost']
+
+    def __init__(self, annual_rate: float, months: int,
+                 payments_made: int = 60, loss_rate: float = 0.35):
+        self.annual_rate = annual_rate
+        self.months = months
+        self.payments_made = payments_made
+        self.loss_rate = loss_rate
+        self.totals = dict.fromkeys(self.FIELDS, 0.0)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Accumulate one compute_el() chunk."""
+        totals = portfolio_totals(
+            loan=chunk['LOAN'].to_numpy(dtype=float),
+            ead=chunk['MORTDUE'].to_numpy(dtype=float),
+            default_proba=chunk['default_proba'].to_numpy(dtype=float),
+            el_amount=chunk['EL_amount'].to_numpy(dtype=float),
+            model_prediction=chunk['model_prediction'].to_numpy(),
+            bad=chunk['BAD'].to_numpy(),
+            annual_rate=self.annual_rate,
+            months=self.months,
+            payments_made=self.payments_made
+        )
+        for field in self.FIELDS:
+            self.totals[field] += totals[field]
+
+    def merge(self, other: 'PortfolioAccumulator') -> 'PortfolioAccumulator':
+        """Add another accumulator's totals and return self."""
+        for field in self.FIELDS:
+            self.totals[field] += other.totals[field]
+        return self
+
+    def metrics(self) -> dict:
+        """Same keys as compute_portfolio_metrics()."""
+        return metrics_from_totals(self.totals, self.loss_rate)
+
+
+def streaming_risk_buckets(
+    chunk_source: Callable[[], Iterable[pd.DataFrame]],
+    q: int = 4,
+    labels: list[str] = BUCKET_LABELS,
+    k: int = 400
+) -> pd.DataFrame:
+    """
+    risk_bucket_table() over a chunked book in two streaming passes.
+
+    Pass 1 sketches PD quantiles for the bucket edges; pass 2 bins each
+    chunk and accumulates the per-bucket sums.
+
+    Args:
+        chunk_source (Callable): Returns a fresh iterable of compute_el() chunks.
+        q            (int)     : Number of quantile buckets.
+        labels       (list[str]): Bucket names (length q).
+        k            (int)     : KLL accuracy parameter.
+
+    Returns:
+        pd.DataFrame: Bucket summary table.
+    """
+    sketch = KLLSketch(k=k)
+    for chunk in chunk_source():
+        sketch.update(chunk['default_proba'].to_numpy())
+
+    edges = sketch.quantile(np.linspace(0, 1, q + 1))
+    buckets = BucketAccumulator(edges, labels)
+    for chunk in chunk_source():
+        buckets.update(chunk)
+    return buckets.table()
+
+
+def streaming_portfolio_metrics(
+    chunks: Iterable[pd.DataFrame],
+    annual_rate: float,
+    months: int,
+    **kwargs
+) -> dict:
+    """
+    compute_portfolio_metrics() over a chunked book in one pass.
+
+    Args:
+        chunks      (Iterable[pd.DataFrame]): compute_el() chunks.
+        annual_rate (float)                 : Annual interest rate.
+        months      (int)                   : Total number of monthly payments.
+        **kwargs                            : payments_made / loss_rate.
+
+    Returns:
+        dict: Portfolio metrics.
+    """
+    acc = PortfolioAccumulator(annual_rate, months, **kwargs)
+    for chunk in chunks:
+        acc.update(chunk)
+    return acc.metrics()
@@ -0,0 +1,19 @@
+import numpy as np
+
+from explain import ExplanationStore
+
+
+def test_save_load_round_trip_with_string_ids(tmp_path):
+    values = np.array([[0.2, -0.1, 0.4], [-0.3, 0.5, 0.1], [0.0, 0.0, -0.2]])
+    index = np.array(['LN-0003', 'LN-0001', 'LN-0002'], dtype=object)
+    store = ExplanationStore(values, -1.5, index, ['LTV', 'DEBTINC', 'CLAGE'])
+
+    path = tmp_path / 'shap.npz'
+    store.save(path)
+    loaded = ExplanationStore.load(path)
+
+    assert loaded.base_value == -1.5
+    assert list(loaded.features) == ['LTV', 'DEBTINC', 'CLAGE']
+    for loan_id, row in zip(index, values):
+        np.testing.assert_array_equal(loaded.row(loan_id), row)
+    assert loaded.reason_codes('LN-0001') == [('DEBTINC', 0.5), ('CLAGE', 0.1)]
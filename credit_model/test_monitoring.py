@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from monitoring import build_reference, DriftMonitor
+
+
+def _book(n: int, share_sales: float, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'LOAN'     : rng.lognormal(9.5, 0.5, n),
+        'JOB_Sales': (rng.uniform(size=n) < share_sales).astype(float),
+    })
+
+
+def _csi(reference: dict, batch: pd.DataFrame) -> pd.Series:
+    monitor = DriftMonitor(reference)
+    monitor.update(batch)
+    return monitor.feature_report()['PSI']
+
+
+def test_one_hot_flag_shift_raises_csi():
+    train = _book(5_000, 0.02, seed=0)
+    reference = build_reference(train, np.full(len(train), 0.1))
+
+    stable = _csi(reference, _book(5_000, 0.02, seed=1))
+    shifted = _csi(reference, _book(5_000, 0.30, seed=2))
+
+    assert stable['JOB_Sales'] < 0.10
+    assert shifted['JOB_Sales'] > 0.25
+    assert shifted['LOAN'] < 0.10
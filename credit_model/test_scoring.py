@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from Credit_Model import train_xgboost
+from scoring import predict_pd
+
+
+@pytest.fixture(scope='module')
+def book():
+    rng = np.random.default_rng(7)
+    X = pd.DataFrame(rng.normal(size=(2_000, 4)), columns=['LTV', 'DEBTINC', 'CLAGE', 'DELINQ'])
+    y = pd.Series((X['LTV'] + rng.normal(size=len(X)) > 1).astype(int))
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def models(book):
+    X, y = book
+    xgb = train_xgboost(X, y, X, y, random_state=29, early_stopping_rounds=None,
+                        params={'n_estimators': 20})
+    return [xgb, LogisticRegression().fit(X, y)]
+
+
+def test_empty_input_returns_empty(models, book):
+    X, _ = book
+    for model in models:
+        assert predict_pd(model, X.iloc[:0]).shape == (0,)
+
+
+def test_batches_match_single_pass(models, book):
+    X, _ = book
+    for model in models:
+        np.testing.assert_allclose(predict_pd(model, X, batch_size=300),
+                                   predict_pd(model, X), rtol=0, atol=1e-7)
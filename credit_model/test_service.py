@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from Credit_Model import load_data, feature_engineering, prepare_model_inputs, train_xgboost
+from scoring import save_scoring_model
+from service import ScoringEngine
+
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    X_train, X_val, y_train, y_val = prepare_model_inputs(
+        df=feature_engineering(load_data('hmeq_cleaned.csv')),
+        target='BAD', drop_cols=['HOME_EQUITY', 'TOTAL_DEBT'])
+    model = train_xgboost(X_train, y_train, X_val, y_val, random_state=29,
+                          params={'n_estimators': 30})
+    model_dir = tmp_path_factory.mktemp('model')
+    save_scoring_model(model, str(model_dir), 0.5, 0.30)
+    return ScoringEngine(str(model_dir))
+
+
+def test_pd_does_not_depend_on_batch_mates(engine):
+    raw = load_data('hmeq_cleaned.csv').drop(columns='BAD')
+    applications = [
+        {k: float(v) for k, v in row.items() if not k.startswith('JOB_')}
+        for row in raw.head(20).to_dict('records')
+    ]
+    with_job = {**applications[0], 'JOB_Mgr': 1.0}
+
+    alone = [engine.score([app])[0]['pd'] for app in applications]
+    mixed = [r['pd'] for r in engine.score([with_job] + applications)[1:]]
+
+    np.testing.assert_allclose(mixed, alone, rtol=0, atol=1e-7)
@@ -0,0 +1,14 @@
+from tuning import hyperband_brackets, rung_budgets
+
+
+def test_rung_budgets_follow_hyperband_schedule():
+    assert rung_budgets(100, 3, 2) == [11, 33, 100]
+    assert rung_budgets(1000, 3, 3) == [37, 111, 333, 1000]
+
+
+def test_brackets_end_at_max_budget_without_duplicate_rungs():
+    brackets = hyperband_brackets(11, 100, 3)
+    assert brackets == [(9, [11, 33, 100]), (5, [33, 100]), (3, [100])]
+    for _, budgets in brackets:
+        assert budgets[-1] == 100
+        assert len(set(budgets)) == len(budgets)
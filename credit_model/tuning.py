@@ -0,0 +1,430 @@
+import os
+import json
+import math
+import hashlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.metrics import roc_auc_score
+
+from Credit_Model import (
+    cv_folds,
+    best_iteration,
+    QuantizedTrainingSet,
+    train_xgboost_dmatrix,
+    load_data,
+    feature_engineering,
+    prepare_model_inputs,
+    bootstrap_weights,
+)
+
+# ══════════════════════════════════════════════════════════════════
+# HYPERPARAMETER SEARCH FOR THE XGBOOST PD MODEL
+# Random search pruned with successive halving / Hyperband.
+# The budget of a trial is its number of boosting rounds
+# (n_estimators); every trial is scored on the same folds as
+# k_fold_cross_validation().
+# ══════════════════════════════════════════════════════════════════
+
+# name: (kind, low, high). 'log' samples uniformly in log space.
+SEARCH_SPACE = {
+    'max_depth'       : ('int',   3,     10),
+    'min_child_weight': ('int',   1,     10),
+    'subsample'       : ('float', 0.5,   1.0),
+    'colsample_bytree': ('float', 0.5,   1.0),
+    'learning_rate'   : ('log',   0.005, 0.3),
+    'reg_lambda'      : ('log',   0.1,   10.0),
+}
+
+
+def sample_config(rng: np.random.Generator, space: dict = SEARCH_SPACE) -> dict:
+    """
+    Draw one random configuration from the search space.
+
+    Floats are rounded so the same seed always reproduces the same
+    cache keys across runs.
+
+    Args:
+        rng   (np.random.Generator): Seeded random generator.
+        space (dict)               : Search space definition.
+
+    Returns:
+        dict: Hyperparameter configuration.
+    """
+    config = {}
+    for name, (kind, low, high) in space.items():
+        if kind == 'int':
+            config[name] = int(rng.integers(low, high + 1))
+        elif kind == 'log':
+            config[name] = round(float(np.exp(rng.uniform(np.log(low), np.log(high)))), 5)
+        else:
+            config[name] = round(float(rng.uniform(low, high)), 4)
+    return config
+
+
+def data_fingerprint(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    folds: list,
+    random_state: int,
+    sample_weight: np.ndarray | None = None
+) -> str:
+    """
+    Hash of everything besides the configuration that a trial's AUC depends on.
+
+    Covers the shape and contents of the training set, the weights, the
+    number of folds, the fold assignment and the model seed, so cached
+    trials are only reused for the same search setup.
+
+    Args:
+        X_train       (pd.DataFrame)     : Training features.
+        y_train       (pd.Series)        : Training labels.
+        folds         (list)             : cv_folds() output.
+        random_state  (int)              : Model seed.
+        sample_weight (np.ndarray | None): Optional per-row weights.
+
+    Returns:
+        str: Hex digest.
+    """
+    h = hashlib.sha1()
+    h.update(json.dumps({'shape': X_train.shape, 'columns': list(X_train.columns),
+                         'n_splits': len(folds), 'random_state': random_state}).encode())
+    h.update(pd.util.hash_pandas_object(X_train, index=False).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(y_train, index=False).to_numpy().tobytes())
+    if sample_weight is not None:
+        h.update(np.ascontiguousarray(sample_weight, dtype=np.float64).tobytes())
+    for _, val_idx in folds:
+        h.update(np.ascontiguousarray(val_idx, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def trial_key(config: dict, budget: int, fingerprint: str) -> str:
+    """Stable cache key for a (configuration, budget) pair on one data fingerprint."""
+    payload = json.dumps({'config': config, 'budget': budget, 'data': fingerprint},
+                         sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def load_trial_cache(path: str) -> dict:
+    """
+    Read finished trials from a JSON-lines cache file.
+
+    Args:
+        path (str): Cache file; missing files yield an empty cache.
+
+    Returns:
+        dict: {trial_key: trial record}.
+    """
+    if not os.path.exists(path):
+        return {}
+    cache = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                cache[record['key']] = record
+    return cache
+
+
+def append_trial(path: str, record: dict) -> None:
+    """Append one finished trial to the cache so interrupted searches resume."""
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+# ── Worker-side state ─────────────────────────────────────────────
+# Training data, weights and folds are shipped once per process through the
+# pool initializer instead of being pickled with every trial. Each
+# worker quantizes the training set once; every trial and fold reuses
+# those cut points through row views.
+
+_WORKER = {}
+
+
+def _init_worker(X_train: pd.DataFrame, y_train: pd.Series, folds: list, random_state: int,
+                 sample_weight: np.ndarray | None, fingerprint: str) -> None:
+    dataset = QuantizedTrainingSet(X_train, y_train, sample_weight)
+    views = []
+    for train_idx, val_idx in folds:
+        dtrain = dataset.view(train_idx)
+        w_val = None if sample_weight is None else sample_weight[val_idx]
+        views.append((dtrain, dataset.view(val_idx, ref=dtrain), y_train.iloc[val_idx], w_val))
+    _WORKER.update(random_state=random_state, views=views, fingerprint=fingerprint)
+
+
+def evaluate_trial(config: dict, budget: int) -> dict:
+    """
+    Cross-validated AUC of one configuration at a given budget.
+
+    Fold AUCs are weighted by the sample weights, as in
+    k_fold_cross_validation().
+
+    Args:
+        config (dict): Hyperparameters to override in XGB_PARAMS.
+        budget (int) : Maximum boosting rounds (n_estimators).
+
+    Returns:
+        dict: Trial record with config, budget, mean/std AUC and
+              the best iteration reached on each fold.
+    """
+    params = {**config, 'n_estimators': budget, 'n_jobs': 1}
+
+    aucs, iterations = [], []
+    for dtrain, dval, y_val, w_val in _WORKER['views']:
+        model = train_xgboost_dmatrix(dtrain, dval, random_state=_WORKER['random_state'],
+                                      params=params)
+        proba = model.get_booster().predict(dval, iteration_range=(0, best_iteration(model)))
+        aucs.append(roc_auc_score(y_val, proba, sample_weight=w_val))
+        iterations.append(best_iteration(model))
+
+    return {
+        'key'            : trial_key(config, budget, _WORKER['fingerprint']),
+        'config'         : config,
+        'budget'         : budget,
+        'mean_auc'       : float(np.mean(aucs)),
+        'std_auc'        : float(np.std(aucs)),
+        'fold_iterations': iterations,
+        'data'           : _WORKER['fingerprint'],
+    }
+
+
+def _run_rung(configs: list[dict], budget: int, pool: ProcessPoolExecutor,
+              cache: dict, cache_path: str, fingerprint: str) -> list[dict]:
+    """Evaluate configs at one budget, reusing cached trials."""
+    records = {}
+    pending = {}
+    for i, config in enumerate(configs):
+        key = trial_key(config, budget, fingerprint)
+        if key in cache:
+            records[i] = cache[key]
+        else:
+            pending[i] = pool.submit(evaluate_trial, config, budget)
+
+    for i, future in pending.items():
+        record = future.result()
+        cache[record['key']] = record
+        append_trial(cache_path, record)
+        records[i] = record
+
+    return [records[i] for i in range(len(configs))]
+
+
+def max_halvings(min_budget: int, max_budget: int, eta: int) -> int:
+    """Largest s with max_budget · eta^-s >= min_budget."""
+    return int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9))
+
+
+def rung_budgets(max_budget: int, eta: int, s: int) -> list[int]:
+    """
+    Boosting rounds per rung of a bracket with s halvings.
+
+    Rung i gets round(max_budget · eta^-(s-i)), so budgets grow by eta
+    and the last rung is exactly max_budget.
+
+    Args:
+        max_budget (int): Boosting rounds in the last rung.
+        eta        (int): Reduction factor between rungs.
+        s          (int): Number of halvings (rungs - 1).
+
+    Returns:
+        list[int]: Strictly increasing budgets, one per rung.
+    """
+    budgets = [int(round(max_budget * eta ** -(s - i))) for i in range(s + 1)]
+    return sorted(set(max(b, 1) for b in budgets))
+
+
+def hyperband_brackets(min_budget: int, max_budget: int, eta: int) -> list[tuple[int, list[int]]]:
+    """
+    Hyperband schedule: (number of configurations, rung budgets) per bracket.
+
+    Args:
+        min_budget (int): Smallest number of boosting rounds.
+        max_budget (int): Largest number of boosting rounds.
+        eta        (int): Reduction factor between rungs.
+
+    Returns:
+        list: One (n_configs, budgets) pair per bracket, most aggressive first.
+    """
+    s_max = max_halvings(min_budget, max_budget, eta)
+    return [
+        (int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), rung_budgets(max_budget, eta, s))
+        for s in range(s_max, -1, -1)
+    ]
+
+
+def successive_halving(
+    configs: list[dict],
+    budgets: list[int],
+    eta: int,
+    pool: ProcessPoolExecutor,
+    cache: dict,
+    cache_path: str,
+    fingerprint: str
+) -> list[dict]:
+    """
+    Successive halving over a fixed set of configurations.
+
+    Every rung evaluates the survivors at its budget and keeps the top
+    1/eta by mean AUC for the next rung.
+
+    Args:
+        configs     (list[dict])         : Starting configurations.
+        budgets     (list[int])          : Boosting rounds per rung (rung_budgets()).
+        eta         (int)                : Reduction factor between rungs.
+        pool        (ProcessPoolExecutor): Initialised worker pool.
+        cache       (dict)               : Finished trials keyed by trial_key().
+        cache_path  (str)                : JSON-lines file trials are appended to.
+        fingerprint (str)                : data_fingerprint() of the search setup.
+
+    Returns:
+        list[dict]: Every trial record evaluated in this bracket.
+    """
+    history = []
+
+    for rung, budget in enumerate(budgets):
+        records = _run_rung(configs, budget, pool, cache, cache_path, fingerprint)
+        history.extend(records)
+
+        n_rung = len(configs)
+        print(f"  Rung budget={budget:>5} — {n_rung} configs, "
+              f"best AUC: {max(r['mean_auc'] for r in records):.4f}")
+
+        if rung == len(budgets) - 1:
+            break
+
+        n_keep = max(1, n_rung // eta)
+        ranked = sorted(records, key=lambda r: r['mean_auc'], reverse=True)
+        configs = [r['config'] for r in ranked[:n_keep]]
+
+    return history
+
+
+def tune_xgboost(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    n_splits: int = 5,
+    random_state: int = 29,
+    method: str = 'hyperband',
+    n_trials: int = 27,
+    min_budget: int = 37,
+    max_budget: int = 1000,
+    eta: int = 3,
+    n_workers: int | None = None,
+    cache_path: str = 'tuning_trials.jsonl',
+    seed: int = 0,
+    sample_weight: np.ndarray | None = None
+) -> dict:
+    """
+    Search XGBoost hyperparameters with random sampling and early pruning.
+
+    method='successive_halving' runs a single bracket of n_trials random
+    configurations on rungs from about min_budget up to max_budget, growing
+    by eta (rung_budgets()). method='hyperband' runs the
+    full set of Hyperband brackets between min_budget and max_budget,
+    trading off many cheap trials against few long ones.
+
+    Trials run in parallel across processes and are cached in
+    cache_path; rerunning with the same seed resumes from the cache.
+    Cache keys include data_fingerprint(), so trials scored on other
+    data, weights, folds or seeds are never reused.
+
+    Args:
+        X_train       (pd.DataFrame)     : Training features.
+        y_train       (pd.Series)        : Training labels.
+        n_splits      (int)              : Number of CV folds.
+        random_state  (int)              : Fold and model seed, as in k_fold_cross_validation().
+        method        (str)              : 'hyperband' or 'successive_halving'.
+        n_trials      (int)              : Configurations for successive halving.
+        min_budget    (int)              : Smallest number of boosting rounds.
+        max_budget    (int)              : Largest number of boosting rounds.
+        eta           (int)              : Reduction factor between rungs.
+        n_workers     (int | None)       : Worker processes (default: CPU count).
+        cache_path    (str)              : JSON-lines trial cache.
+        seed          (int)              : Seed for configuration sampling.
+        sample_weight (np.ndarray | None): Optional per-row weights (bootstrap_weights()).
+
+    Returns:
+        dict: Best trial record at max_budget.
+    """
+    if method not in ('hyperband', 'successive_halving'):
+        raise ValueError(f"Unknown method: {method}")
+
+    rng = np.random.default_rng(seed)
+    folds = cv_folds(X_train, y_train, n_splits, random_state)
+    fingerprint = data_fingerprint(X_train, y_train, folds, random_state, sample_weight)
+    cache = load_trial_cache(cache_path)
+    stale = sum(r.get('data') != fingerprint for r in cache.values())
+    if stale:
+        print(f"  Ignoring {stale} cached trials from a different data/fold setup")
+    if len(cache) > stale:
+        print(f"  Resuming with {len(cache) - stale} cached trials")
+
+    if method == 'successive_halving':
+        brackets = [(n_trials, rung_budgets(max_budget, eta,
+                                            max_halvings(min_budget, max_budget, eta)))]
+    else:
+        brackets = hyperband_brackets(min_budget, max_budget, eta)
+
+    history = []
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(X_train, y_train, folds, random_state,
+                                       sample_weight, fingerprint)) as pool:
+        for n_configs, budgets in brackets:
+            print(f"\n Bracket: {n_configs} configs, budgets {budgets}")
+            configs = [sample_config(rng) for _ in range(n_configs)]
+            history.extend(successive_halving(configs, budgets, eta,
+                                              pool, cache, cache_path, fingerprint))
+
+    final = [r for r in history if r['budget'] == max_budget]
+    best = max(final, key=lambda r: r['mean_auc'])
+    print(f"\n  Best CV AUC: {best['mean_auc']:.4f} ± {best['std_auc']:.4f}")
+    return best
+
+
+def save_best_params(best: dict, path: str = 'best_params.json') -> None:
+    """
+    Persist the best trial as a config artifact for train_xgboost().
+
+    n_estimators is set to the budget the trial was scored at; early
+    stopping in train_xgboost() still trims it on the validation set.
+
+    Args:
+        best (dict): Trial record returned by tune_xgboost().
+        path (str) : Output JSON file.
+    """
+    artifact = {
+        'params'  : {**best['config'], 'n_estimators': best['budget']},
+        'mean_auc': best['mean_auc'],
+        'std_auc' : best['std_auc'],
+    }
+    with open(path, 'w') as f:
+        json.dump(artifact, f, indent=2)
+
+
+def load_best_params(path: str = 'best_params.json') -> dict:
+    """
+    Load tuned hyperparameters for train_xgboost(params=...).
+
+    Args:
+        path (str): JSON file written by save_best_params().
+
+    Returns:
+        dict: XGBoost parameter overrides.
+    """
+    with open(path) as f:
+        return json.load(f)['params']
+
+
+if __name__ == '__main__':
+    # Same training set and bootstrap weights main() cross-validates on
+    # (bootstrap='weights'); no duplicated rows across the CV splits
+    data = feature_engineering(load_data('hmeq_cleaned.csv'))
+    X_train, _, y_train, _ = prepare_model_inputs(
+        df=data,
+        target='BAD',
+        drop_cols=['HOME_EQUITY', 'TOTAL_DEBT']
+    )
+
+    best = tune_xgboost(X_train, y_train, sample_weight=bootstrap_weights(X_train))
+    save_best_params(best)